@@ -2,7 +2,7 @@
 
 import json
 import os
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional
 
 from rank_items import rank_items
 from llm_client import call_llm
@@ -10,10 +10,57 @@ from llm_client import call_llm
 # Toggle via .env: USE_LLM_AGENT=true / false
 USE_LLM_AGENT = os.getenv("USE_LLM_AGENT", "false").lower() == "true"
 
-
-def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
-
-    trace: List[Dict[str, Any]] = []
+# How much of the agent trace is returned to the frontend:
+# - off:     no trace
+# - summary: each step with its outcome (counts, reasons, chosen order)
+# - full:    also sample scores, the LLM prompts and raw response, ...
+# TRACE_LEVEL is the deployment default; requests can ask for another level.
+TRACE_LEVELS = ("off", "summary", "full")
+TRACE_LEVEL = os.getenv("TRACE_LEVEL", "summary").lower()
+if TRACE_LEVEL not in TRACE_LEVELS:
+    print(f">>> Unknown TRACE_LEVEL {TRACE_LEVEL!r}, using 'summary'")
+    TRACE_LEVEL = "summary"
+
+
+def trace_level(level: Optional[str] = None) -> str:
+    """Validated trace level (TRACE_LEVEL if level is None or empty)."""
+    level = level or TRACE_LEVEL
+    if not isinstance(level, str) or level.lower() not in TRACE_LEVELS:
+        raise ValueError(f"Unknown trace level {level!r}, expected one of {', '.join(TRACE_LEVELS)}.")
+    return level.lower()
+
+
+class Trace:
+    """
+    Trace entries for one ranking run. The detail of a step is passed as a
+    function and only built at level "full", so the prompts and sample
+    scores cost nothing at the lower levels.
+    """
+
+    def __init__(self, level: Optional[str] = None):
+        self.level = trace_level(level)
+        self.entries: List[Dict[str, Any]] = []
+
+    def add(self, step: str, summary: Optional[Dict[str, Any]] = None,
+            detail: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+        if self.level == "off":
+            return
+        entry = {"step": step, **(summary or {})}
+        if self.level == "full" and detail is not None:
+            entry.update(detail())
+        self.entries.append(entry)
+
+
+def agent_rank_with_llm(
+    user_query: str,
+    items: List[Dict],
+    level: Optional[str] = None,
+    ranked: Optional[List[Dict]] = None,
+) -> Dict[str, Any]:
+    # ranked: items already scored and sorted by the graph (best first), so
+    # they aren't scored again; None: rank `items` here
+
+    trace = Trace(level)
 
     # ---- 1) RULE-BASED RANKING (always run) ----
     # NOTE: this uses rank_items.score_item under the hood:
@@ -28,14 +75,15 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
         "total_score_formula": "price_score + delivery_score + similarity_score",
     }
 
-    ranked = rank_items(user_query, items)
+    if ranked is None:
+        ranked = rank_items(user_query, items)
 
-    trace.append({
-        "step": "rule_ranking",
+    trace.add("rule_ranking", {
         "description": "Deterministic rule-based scoring of all items.",
-        "rule_weights": rule_weights,
         "input_count": len(items),
         "output_count": len(ranked),
+    }, lambda: {
+        "rule_weights": rule_weights,
         "sample_scores": [
             {
                 "title": it.get("title"),
@@ -55,7 +103,7 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
             "ranked_items": [],
             "llm_choice": None,
             "llm_explanation": "No items were available.",
-            "trace": trace,
+            "trace": trace.entries,
         }
 
     # Default (if LLM disabled or fails): stick with rule based top item
@@ -67,15 +115,14 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
 
     # SHORT-CIRCUIT IF LLM AGENT IS DISABLED
     if not USE_LLM_AGENT:
-        trace.append({
-            "step": "llm_ranking_skipped",
+        trace.add("llm_ranking_skipped", {
             "reason": "USE_LLM_AGENT is false – using rule-based ranking only.",
         })
         return {
             "ranked_items": ranked,
             "llm_choice": default_choice,
             "llm_explanation": default_explanation,
-            "trace": trace,
+            "trace": trace.entries,
         }
 
     # PREPARE TOP-K CANDIDATES FOR LLM JUDGEMENT
@@ -146,9 +193,10 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
         max_tokens=512,
     )
 
-    trace.append({
-        "step": "llm_ranking_call",
+    trace.add("llm_ranking_call", {
         "description": "LLM returns final 0–100 judgement scores and reasons.",
+        "candidate_count": len(candidates),
+    }, lambda: {
         "prompt_system": system_prompt,
         "prompt_user": user_msg,
         "raw_response": raw_response,
@@ -162,28 +210,25 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
     try:
         parsed = json.loads(raw_response)
     except Exception as e:
-        trace.append({
-            "step": "llm_ranking_parse_error",
+        trace.add("llm_ranking_parse_error", {
             "error": f"Failed to parse LLM JSON; using rule-based ranking. {repr(e)}",
         })
         return {
             "ranked_items": final_ranked,
             "llm_choice": llm_choice,
             "llm_explanation": llm_explanation,
-            "trace": trace,
+            "trace": trace.entries,
         }
 
     if not isinstance(parsed, dict) or "ranking" not in parsed or not isinstance(parsed["ranking"], list):
-        trace.append({
-            "step": "llm_ranking_invalid_shape",
+        trace.add("llm_ranking_invalid_shape", {
             "error": "Parsed JSON missing 'ranking' list; using rule-based ranking.",
-            "parsed": parsed,
-        })
+        }, lambda: {"parsed": parsed})
         return {
             "ranked_items": final_ranked,
             "llm_choice": llm_choice,
             "llm_explanation": llm_explanation,
-            "trace": trace,
+            "trace": trace.entries,
         }
 
     ranking_entries = parsed["ranking"]
@@ -212,16 +257,14 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
 
     # If LLM gave us no valid indices, keep rule-based ranking
     if not new_order_indices:
-        trace.append({
-            "step": "llm_ranking_empty",
+        trace.add("llm_ranking_empty", {
             "error": "LLM returned no usable indices; using rule-based ranking.",
-            "parsed": parsed,
-        })
+        }, lambda: {"parsed": parsed})
         return {
             "ranked_items": final_ranked,
             "llm_choice": llm_choice,
             "llm_explanation": llm_explanation,
-            "trace": trace,
+            "trace": trace.entries,
         }
 
     # Add any candidates not mentioned by LLM at the end in original rule order
@@ -238,12 +281,13 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
     llm_choice = new_top_candidates[0]
     llm_explanation = overall_expl
 
-    # ADD TOP VS SECOND COMPARISON FOR JUDGES
-    top_vs_second = None
-    if len(new_top_candidates) > 1:
+    # ADD TOP VS SECOND COMPARISON FOR JUDGES (built for full traces only)
+    def top_vs_second():
+        if len(new_top_candidates) < 2:
+            return None
         a = new_top_candidates[0]
         b = new_top_candidates[1]
-        top_vs_second = {
+        return {
             "top_title": a.get("title"),
             "second_title": b.get("title"),
             "rule_scores": {
@@ -272,17 +316,15 @@ def agent_rank_with_llm(user_query: str, items: List[Dict]) -> Dict[str, Any]:
             },
         }
 
-    trace.append({
-        "step": "llm_ranking_applied",
+    trace.add("llm_ranking_applied", {
         "description": "Applied LLM judgement scores to re-rank top candidates.",
         "new_order_indices": new_order_indices,
         "overall_explanation": llm_explanation,
-        "top_vs_second_comparison": top_vs_second,
-    })
+    }, lambda: {"top_vs_second_comparison": top_vs_second()})
 
     return {
         "ranked_items": final_ranked,
         "llm_choice": llm_choice,
         "llm_explanation": llm_explanation,
-        "trace": trace,
+        "trace": trace.entries,
     }
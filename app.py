@@ -1,10 +1,16 @@
-from typing import Any, Dict, List
+import json
 import os
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 
-from graph import graph
-from agent_ranking import agent_rank_with_llm 
+import crawler
+import jobs
+from recommend import recommend, shared_recommend_events, coalescing_stats
+from agent_ranking import trace_level
+from llm_client import cache_stats as llm_cache_stats
+from detail_cache import cache_stats as detail_cache_stats
+from search_cache import cache_stats as search_cache_stats
+from catalog import stats as catalog_stats
 
 app = Flask(__name__)
 
@@ -27,55 +33,94 @@ def favicon():
     return send_from_directory(TEMPLATE_DIR, "favicon.png")
 
 
+def requested_trace(data: dict):
+    # agent trace level from the body or ?trace= (off / summary / full),
+    # None for the TRACE_LEVEL default; raises ValueError if unknown
+    trace = data.get("trace")
+    if trace is None:
+        trace = request.args.get("trace")
+    if trace is not None:
+        if not isinstance(trace, str):
+            raise ValueError(f"Trace level must be a string, got {trace!r}.")
+        trace_level(trace)
+    return trace
+
+
 @app.post("/api/recommend")
-def recommend():
+def recommend_endpoint():
+    # synchronous: blocks until the whole recommendation is ready
     data = request.get_json(force=True) or {}
+    try:
+        trace = requested_trace(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(recommend(data.get("user_input", ""), trace))
+
+
+@app.route("/api/recommend/stream", methods=["GET", "POST"])
+def recommend_stream():
+    # Server-Sent Events: one event per step (see recommend.recommend_events),
+    # ending with "result" (or "error")
+    data = (request.get_json(force=True) or {}) if request.method == "POST" else request.args
     user_input = data.get("user_input", "")
-
-    print(">>> Received from frontend:\n", user_input)
-    print(">>> Calling graph.invoke(...)")
-
-    # LangGraph workflow
-    initial_state: Dict[str, Any] = {"user_input": user_input}
-    final_state = graph.invoke(initial_state)
-
-    print(">>> Full final_state:", final_state, type(final_state))
-
-    #Take items from graph output
-    items: List[Dict[str, Any]] = (
-        final_state.get("ranked_items")
-        or final_state.get("items")
-        or []
+    try:
+        trace = requested_trace(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def events():
+        # sent first so proxies and the browser get bytes straight away
+        yield ": stream opened\n\n"
+        try:
+            for event, data in shared_recommend_events(user_input, trace):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            print(">>> Recommendation stream failed:", repr(e))
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    if not items:
-        return jsonify({
-            "ranked_items": [],
-            "llm_choice": None,
-            "llm_explanation": "No items found.",
-            "trace": [],
-        })
 
-    # Run explainable ranking agent
-    agent_result = agent_rank_with_llm(user_input, items)
+@app.post("/api/jobs")
+def create_job():
+    # asynchronous: returns a job id straight away, poll GET /api/jobs/<id>
+    data = request.get_json(force=True) or {}
+    try:
+        trace = requested_trace(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    job = jobs.submit(data.get("user_input", ""), trace)
+    return jsonify(job), 202, {"Location": f"/api/jobs/{job['job_id']}"}
+
 
-    ranked_items = agent_result["ranked_items"]
-    llm_choice = agent_result["llm_choice"]
-    llm_explanation = agent_result["llm_explanation"]
-    trace = agent_result["trace"]
+@app.get("/api/jobs/<job_id>")
+def get_job(job_id: str):
+    job = jobs.snapshot(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job id."}), 404
+    return jsonify(job)
 
-    top_k = 10
 
-    # Return everything to the frontend
+@app.get("/api/cache-stats")
+def cache_stats():
     return jsonify({
-        "ranked_items": ranked_items[:top_k],
-        "llm_choice": llm_choice,
-        "llm_explanation": llm_explanation,
-        "trace": trace,
+        "llm": llm_cache_stats(),
+        "details": detail_cache_stats(),
+        "search": search_cache_stats(),
+        "coalescing": coalescing_stats(),
+        "catalog": catalog_stats(),
+        "crawler": crawler.status() if crawler.CRAWLER_ENABLED else None,
     })
 
 
 if __name__ == "__main__":
+    # with the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+    if crawler.CRAWLER_ENABLED and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        crawler.start()
     app.run(host="0.0.0.0", port=8005, debug=True)
 
 
@@ -0,0 +1,94 @@
+"""
+Compare ByRotation detail extraction from the embedded listing JSON
+(br_2.parse_details) with the old regex scan of the page text
+(br_2.parse_page_text): time per page and how many fields each fills.
+
+Usage (from the repo root):
+    python benchmarks/br_structured.py saved/br1.html saved/br2.html
+    python benchmarks/br_structured.py            # synthetic Next.js pages
+
+Save pages with e.g. `curl -s <product url> > saved/br1.html`; the product
+url is read back from the page's canonical link when there is one.
+
+Only saved pages say anything about field coverage: the synthetic pages are
+built with the same listing keys br_2.listing_to_item reads, so they just
+exercise the code path and its timing.
+"""
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sites import br_2  # noqa: E402
+
+REPEATS = int(os.getenv("BENCH_REPEATS", "20"))
+
+
+def synthetic_page(slug: str, app_router: bool, blocks: int = 300) -> str:
+    """A product page with its listing embedded the way Next.js does it."""
+    listing = {
+        "slug": slug, "title": "Ruched Satin Midi Dress", "brand": {"name": "Reformation"},
+        "description": "Bias cut satin midi dress in deep red.", "size": "UK 10", "colour": "Red",
+        "location": {"name": "London"}, "user": {"username": "wardrobe_jo"}, "rrp": 280,
+        "rentalPrices": [{"days": 3, "pricePerDay": 14}, {"days": 7, "pricePerDay": 11}, {"days": 28, "pricePerDay": 6}],
+        "images": [{"url": f"https://cdn.example.com/product/{slug}-{i}.jpg"} for i in range(4)],
+    }
+    filler = "".join(
+        f"<div class='row'><p>Block {i}</p></div><script>window.__chunk{i} = {{'a': {i}}};</script>"
+        for i in range(blocks)
+    )
+    if app_router:
+        payload = "5:" + json.dumps(["$", "main", None, {"listing": listing}], separators=(",", ":"))
+        data = "".join(
+            f"<script>self.__next_f.push([1,{json.dumps(payload[i:i + 200])}])</script>"
+            for i in range(0, len(payload), 200)
+        )
+    else:
+        data = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps({"props": {"pageProps": {"listing": listing}}})}</script>'
+    body = (
+        f"<h1>{listing['title']}</h1><p>sizeUK 10 locationLondon colourRed RRP £280</p>"
+        "<div>3+ days£14/day 7+ days£11/day 28+ days£6/day</div>"
+    )
+    return f"<html><head><title>{listing['title']}</title></head><body>{body}{filler}{data}</body></html>"
+
+
+def filled(item: dict) -> int:
+    return sum(1 for value in item.values() if value not in (None, "", "N/A", []))
+
+
+def time_parse(parse, url: str, html: str):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = parse(url, html)
+    return (time.perf_counter() - start) / REPEATS * 1000, result
+
+
+def main(args):
+    pages = []
+    for path in args:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        match = re.search(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', html)
+        url = match.group(1) if match else f"{br_2.BASE_DOMAIN}/products/{os.path.splitext(os.path.basename(path))[0]}"
+        pages.append((os.path.basename(path), url, html))
+    if not pages:
+        for name, app_router in (("next-data", False), ("app-router", True)):
+            slug = f"satin-midi-{name}"
+            pages.append((f"<{name}>", f"{br_2.BASE_DOMAIN}/products/{slug}", synthetic_page(slug, app_router)))
+        print("No saved pages given: synthetic pages, field counts are not evidence of real coverage")
+
+    fields = len(br_2.DETAIL_FIELDS)
+    print(f"{REPEATS} runs each, fields filled out of {fields}")
+    print(f"{'page':<30}{'regex ms':>10}{'fields':>8}{'structured ms':>15}{'fields':>8}")
+    for name, url, html in pages:
+        regex_ms, regex_item = time_parse(br_2.parse_page_text, url, html)
+        structured_ms, structured_item = time_parse(br_2.parse_details, url, html)
+        print(f"{name[:28]:<30}{regex_ms:>10.1f}{filled(regex_item):>8}"
+              f"{structured_ms:>15.1f}{filled(structured_item):>8}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,105 @@
+"""
+Benchmark mwhq_2.scan_page (single traversal) against the nested per-element
+scans it replaced, on a saved MyWardrobeHQ page or a synthetic deep one, and
+check both return the same sizes / material info / sizing info.
+
+Usage (from the repo root):
+    python benchmarks/mwhq_single_pass.py saved/mwhq.html
+    python benchmarks/mwhq_single_pass.py              # synthetic page, DEPTH x WIDTH blocks
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sites import mwhq_2  # noqa: E402
+from sites.html_parse import make_soup  # noqa: E402
+
+REPEATS = int(os.getenv("BENCH_REPEATS", "5"))
+DEPTH = int(os.getenv("BENCH_DEPTH", "40"))
+WIDTH = int(os.getenv("BENCH_WIDTH", "60"))
+
+
+def legacy_scan(soup):
+    """The previous mwhq_2 extraction, kept here as the reference."""
+    sizes = []
+    for select in soup.find_all("select"):
+        select_name = str(select.get('name', '')).lower()
+        select_id = str(select.get('id', '')).lower()
+        if 'size' in select_name or 'size' in select_id or 'variant' in select_name:
+            for opt in select.find_all("option"):
+                opt_text = opt.get_text(strip=True)
+                if opt_text and opt_text.lower() not in ['select', 'select size', 'please select', '']:
+                    if opt_text not in sizes:
+                        sizes.append(opt_text)
+    for script in soup.find_all("script"):
+        if script.string and 'size' in script.string.lower():
+            for size in re.findall(r'UK\s*(\d+)', script.string, re.IGNORECASE):
+                if f"UK {size}" not in sizes:
+                    sizes.append(f"UK {size}")
+    for elem in soup.find_all(['button', 'div', 'span'], class_=lambda x: x and 'size' in str(x).lower()):
+        size_text = elem.get_text(strip=True)
+        if size_text and len(size_text) < 15 and size_text not in sizes:
+            if re.match(r'^(UK\s*)?\d+$', size_text) or size_text.upper() in ['XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL']:
+                sizes.append(size_text)
+
+    material_info = ""
+    sizing_info = ""
+    for div in soup.find_all(['div', 'section', 'article']):
+        div_text = div.get_text("\n", strip=True)
+        if len(div_text) > 20:
+            if any(word in div_text.lower() for word in ['material', 'fabric', 'composition', 'cotton', 'polyester']):
+                if len(div_text) < 500:
+                    material_info = div_text
+            if any(word in div_text.lower() for word in ['model', 'height', 'wearing', 'size guide']):
+                if len(div_text) < 500:
+                    sizing_info = div_text
+    return sizes, material_info, sizing_info
+
+
+def synthetic_page(depth: int, width: int) -> str:
+    """WIDTH sibling columns, each DEPTH nested divs deep, with text at every level."""
+    column = ""
+    for level in range(depth):
+        column = (
+            f"<div class='level-{level}'><p>Level {level} copy about the cotton fabric and fit</p>"
+            f"<span class='size-chip'>UK {6 + 2 * (level % 6)}</span>{column}</div>"
+        )
+    body = "".join(f"<section>{column}</section>" for _ in range(width))
+    extras = (
+        "<select name='size'><option>Select size</option><option>UK 8</option><option>UK 10</option></select>"
+        "<div class='details'><p>Model is 5ft 9 and wearing size UK 8</p></div>"
+        "<script>var product = {\"sizes\": [\"UK 12\"]};</script>"
+    )
+    return f"<html><body>{extras}{body}</body></html>"
+
+
+def main(args):
+    if args:
+        with open(args[0], encoding="utf-8") as f:
+            html, name = f.read(), os.path.basename(args[0])
+    else:
+        html, name = synthetic_page(DEPTH, WIDTH), f"synthetic {DEPTH}x{WIDTH}"
+
+    soup = make_soup(html, keep_scripts=("size",))
+    elements = len(soup.find_all(True))
+
+    timings = {}
+    results = {}
+    for label, scan in (("nested scans", legacy_scan), ("single pass", mwhq_2.scan_page)):
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            results[label] = scan(soup)
+        timings[label] = (time.perf_counter() - start) / REPEATS * 1000
+
+    print(f"page: {name}, {len(html) / 1024:.0f} KB, {elements} elements, {REPEATS} runs each")
+    for label, ms in timings.items():
+        print(f"  {label:<13}{ms:>10.1f} ms")
+    print(f"  speed-up     {timings['nested scans'] / timings['single pass']:>10.1f}x")
+    print(f"  same output  {results['nested scans'] == results['single pass']}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,93 @@
+"""
+Benchmark the HTML product page parsers (gmd_2, mwhq_2, br_2) with the
+default html.parser backend against the fast backend (sites/html_parse.py),
+and check both produce the same item dicts.
+
+Usage (from the repo root):
+    python benchmarks/parse_html.py gmd:saved/gmd.html mwhq:saved/mwhq.html br:saved/br.html
+    python benchmarks/parse_html.py            # synthetic pages, if none are saved
+
+Save pages with e.g. `curl -s <product url> > saved/gmd.html`.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sites import html_parse, gmd_2, mwhq_2, br_2  # noqa: E402
+
+MODULES = {"gmd": gmd_2, "mwhq": mwhq_2, "br": br_2}
+REPEATS = int(os.getenv("BENCH_REPEATS", "20"))
+
+
+def synthetic_page(site: str, blocks: int = 300) -> str:
+    """A large product-like page: nested divs, styles, svgs and many scripts."""
+    filler = "".join(
+        f"<div class='row'><div class='col'><section><p>Block {i} text about the dress</p>"
+        f"<span class='size-{i % 7}'>UK {6 + 2 * (i % 6)}</span></section></div></div>"
+        f"<style>.c{i}{{color:red}}</style><!-- block {i} -->"
+        f"<script>window.__chunk{i} = {{'a': {i}, 'b': 'x'}};</script>"
+        for i in range(blocks)
+    )
+    head = (
+        "<head><title>SELF PORTRAIT Lace Midi Dress | MY WARDROBE HQ</title>"
+        "<meta property='og:title' content='SELF PORTRAIT Lace Midi Dress | MY WARDROBE HQ'>"
+        "<meta property='og:image' content='https://cdn.example.com/product/thumb_1.jpg'>"
+        "<meta property='og:description' content='A lace midi dress.'></head>"
+    )
+    body = (
+        "<h1>Lace Midi Dress</h1><div class='product-vendor'>Self Portrait</div>"
+        "<img class='product-image' src='//cdn.example.com/product/1.jpg'>"
+        "<p>Retail price £320</p><p>Rent from £45 RRP £320</p>"
+        "<div id='tabs-1'><p>A lace midi dress.</p></div>"
+        "<div id='tabs-2'><p>Material: 100% polyester fabric composition</p></div>"
+        "<div id='tabs-3'><p>Model is 5ft 9 and wearing size UK 8</p></div>"
+        "<select name='size'><option>Select size</option><option>UK 8</option><option>UK 10</option></select>"
+        "<script>var meta = {\"product\": {\"variants\": ["
+        "{\"public_title\": \"UK 8 - 4 days\", \"price\": 4500},"
+        "{\"public_title\": \"UK 10 - 8 days\", \"price\": 6500}]}};</script>"
+        "<script>var product = {\"sizes\": [\"UK 8\", \"UK 10\"], \"image\": \"https://cdn.example.com/product/2.jpg\"};</script>"
+        "<div>3+ days£12.50/day 7+ days£10.00/day</div>"
+    )
+    return f"<html>{head}<body>{body}{filler}</body></html>"
+
+
+def time_parse(module, url: str, html: str):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = module.parse_details(url, html)
+    return (time.perf_counter() - start) / REPEATS * 1000, result
+
+
+def main(args):
+    pages = []
+    for arg in args:
+        site, path = arg.split(":", 1)
+        with open(path, encoding="utf-8") as f:
+            pages.append((site, path, f.read()))
+    if not pages:
+        pages = [(site, "<synthetic>", synthetic_page(site)) for site in MODULES]
+
+    print(f"fast backend: {'lxml' if html_parse.HAVE_LXML else 'html.parser (lxml not installed)'}, {REPEATS} runs each")
+    print(f"{'site':<6}{'page':<30}{'KB':>7}{'default ms':>12}{'fast ms':>10}{'speed-up':>10}  same output")
+    for site, path, html in pages:
+        module = MODULES[site]
+        url = f"https://example.com/{site}/product"
+
+        html_parse.FAST_HTML_PARSER = False
+        slow_ms, slow_result = time_parse(module, url, html)
+        html_parse.FAST_HTML_PARSER = True
+        fast_ms, fast_result = time_parse(module, url, html)
+
+        same = slow_result == fast_result
+        print(f"{site:<6}{os.path.basename(path)[:28]:<30}{len(html) / 1024:>7.0f}"
+              f"{slow_ms:>12.1f}{fast_ms:>10.1f}{slow_ms / fast_ms:>9.1f}x  {same}")
+        if not same:
+            for key in slow_result:
+                if slow_result[key] != fast_result.get(key):
+                    print(f"    {key}: {slow_result[key]!r} != {fast_result.get(key)!r}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
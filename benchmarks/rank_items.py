@@ -0,0 +1,61 @@
+"""
+Benchmark rank_items' batch scoring (query split once) and heap top-k
+selection against scoring items one at a time with score_item and sorting
+the whole list, and check both give the same ranking and score fields.
+
+Usage (from the repo root):
+    python benchmarks/rank_items.py            # 5000 synthetic candidates
+    BENCH_ITEMS=20000 python benchmarks/rank_items.py
+"""
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rank_items  # noqa: E402
+
+ITEMS = int(os.getenv("BENCH_ITEMS", "5000"))
+TOP_K = 10
+QUERY = "red satin midi dress for a summer wedding"
+WORDS = "red black satin silk midi maxi dress gown wedding party summer floral lace cocktail".split()
+
+
+def synthetic_items(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "title": f"Dress {i}",
+            "price": rng.choice([None, rng.randint(20, 150)]),
+            "delivery": rng.choice(["Next Day", "2–3 Days", "Standard", None]),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(5, 30))) + f" style {i}",
+        }
+        for i in range(n)
+    ]
+
+
+def one_at_a_time(query, items):
+    scored = [rank_items.score_item(query, item) for item in items]
+    return sorted(scored, key=lambda x: x.get("total_score", 0.0), reverse=True)[:TOP_K]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    items = synthetic_items(ITEMS)
+    print(f"{ITEMS} candidates, top {TOP_K}")
+    slow_ms, slow = timed(one_at_a_time, QUERY, copy.deepcopy(items))
+    fast_ms, fast = timed(rank_items.rank_items, QUERY, copy.deepcopy(items), TOP_K)
+    print(f"score_item + full sort: {slow_ms:8.1f} ms")
+    print(f"batch + top-k:          {fast_ms:8.1f} ms")
+    print("same result:", slow == fast)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# catalog.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from detail_cache import canonical_url
+from item import _number, image_urls, size_labels
+from search_cache import normalise_query
+
+### local catalog of scraped rental items
+# Every item the sites/*_2 scrapers produce is written to a SQLite database
+# (WAL mode, so readers never wait for the writer) together with the urls
+# each site search returned. The pipeline answers from here first and only
+# scrapes live for searches and items that are missing or older than the
+# TTLs below.
+
+CATALOG_ENABLED = os.getenv("CATALOG", "true").lower() == "true"
+# (default: .cache/ next to this file, whatever the working directory)
+CATALOG_PATH = os.getenv(
+    "CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "catalog.sqlite3")
+)
+# seconds a stored item / search result is used without scraping again
+CATALOG_ITEM_TTL = float(os.getenv("CATALOG_ITEM_TTL", "21600"))
+CATALOG_SEARCH_TTL = float(os.getenv("CATALOG_SEARCH_TTL", "3600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    url          TEXT PRIMARY KEY,  -- canonical product url
+    site         TEXT NOT NULL,
+    platform     TEXT,
+    title        TEXT,
+    brand        TEXT,              -- brand or designer
+    description  TEXT,
+    retail_price REAL,
+    image        TEXT,              -- first image
+    data         TEXT NOT NULL,     -- the full item dict as JSON
+    fetched_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_site ON items (site, fetched_at);
+
+CREATE TABLE IF NOT EXISTS item_sizes (
+    url  TEXT NOT NULL REFERENCES items (url) ON DELETE CASCADE,
+    size TEXT NOT NULL,
+    PRIMARY KEY (url, size)
+);
+
+CREATE TABLE IF NOT EXISTS searches (
+    site         TEXT NOT NULL,
+    query        TEXT NOT NULL,     -- normalised query
+    max_per_site INTEGER NOT NULL,
+    fetched_at   REAL NOT NULL,
+    PRIMARY KEY (site, query, max_per_site)
+);
+
+CREATE TABLE IF NOT EXISTS search_results (
+    site         TEXT NOT NULL,
+    query        TEXT NOT NULL,
+    max_per_site INTEGER NOT NULL,
+    position     INTEGER NOT NULL,
+    url          TEXT NOT NULL,     -- as returned by the site (not canonical)
+    PRIMARY KEY (site, query, max_per_site, position)
+);
+
+CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+    site         TEXT NOT NULL,
+    query        TEXT NOT NULL,
+    cursor       TEXT,              -- JSON: where the next page starts (null = first page)
+    updated_at   REAL NOT NULL,
+    completed_at REAL,              -- when the last full walk of this listing finished
+    PRIMARY KEY (site, query)
+);
+"""
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_init_lock = threading.Lock()
+_initialised = False
+hits = 0
+misses = 0
+
+
+def _connect() -> sqlite3.Connection:
+    """This thread's connection (sqlite3 connections can't be shared between threads)."""
+    global _initialised
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+
+    directory = os.path.dirname(CATALOG_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(CATALOG_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    with _init_lock:
+        if not _initialised:
+            conn.executescript(SCHEMA)
+            _initialised = True
+    _local.conn = conn
+    return conn
+
+
+def put_items(site: str, items: Iterable[Dict[str, Any]]) -> int:
+    """Insert or replace scraped items (failed {} scrapes are skipped). Returns the number stored."""
+    if not CATALOG_ENABLED:
+        return 0
+    now = time.time()
+    rows, sizes = [], []
+    for item in items:
+        if not item or not item.get("url"):
+            continue
+        url = canonical_url(item["url"])
+        rows.append((
+            url, site, item.get("platform"), item.get("title"),
+            item.get("brand") or item.get("designer"), item.get("description"),
+            _number(item.get("retail_price")), next(iter(image_urls(item)), None),
+            json.dumps(item, ensure_ascii=False, default=str), now,
+        ))
+        sizes.extend((url, size) for size in size_labels(item))
+    if not rows:
+        return 0
+
+    conn = _connect()
+    with _write_lock, conn:
+        conn.executemany("DELETE FROM item_sizes WHERE url = ?", [(row[0],) for row in rows])
+        conn.executemany(
+            "INSERT OR REPLACE INTO items "
+            "(url, site, platform, title, brand, description, retail_price, image, data, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.executemany("INSERT OR IGNORE INTO item_sizes (url, size) VALUES (?, ?)", sizes)
+    return len(rows)
+
+
+def get_items(urls: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Stored items for urls that are at most max_age seconds old (default
+    CATALOG_ITEM_TTL), keyed by the url as given.
+    """
+    global hits, misses
+    urls = list(urls)
+    if not CATALOG_ENABLED or not urls:
+        return {}
+    max_age = CATALOG_ITEM_TTL if max_age is None else max_age
+    by_canonical = {canonical_url(url): url for url in urls}
+
+    conn = _connect()
+    found = {}
+    keys = list(by_canonical)
+    for start in range(0, len(keys), 500): # stay under SQLite's bound parameter limit
+        chunk = keys[start:start + 500]
+        rows = conn.execute(
+            f"SELECT url, data FROM items WHERE fetched_at >= ? AND url IN ({','.join('?' * len(chunk))})",
+            [time.time() - max_age, *chunk],
+        )
+        for url, data in rows:
+            found[by_canonical[url]] = json.loads(data)
+    hits += len(found)
+    misses += len(urls) - len(found)
+    return found
+
+
+def get_item(url: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    return get_items([url], max_age).get(url)
+
+
+def put_search(site: str, query: str, max_per_site: int, urls: List[str], fetched_at: Optional[float] = None) -> None:
+    """
+    Record the urls a site search returned (empty results are not kept).
+    fetched_at: when the search actually ran (default now), so results
+    served from an older cache don't count as fresh here.
+    """
+    if not CATALOG_ENABLED or not urls:
+        return
+    key = (site, normalise_query(query), max_per_site)
+    conn = _connect()
+    with _write_lock, conn:
+        conn.execute("DELETE FROM search_results WHERE site = ? AND query = ? AND max_per_site = ?", key)
+        conn.execute("INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)", (*key, fetched_at or time.time()))
+        conn.executemany(
+            "INSERT INTO search_results VALUES (?, ?, ?, ?, ?)",
+            [(*key, position, url) for position, url in enumerate(urls)],
+        )
+
+
+def get_search(site: str, query: str, max_per_site: int, max_age: Optional[float] = None) -> Optional[List[str]]:
+    """Urls of a stored search at most max_age seconds old (default CATALOG_SEARCH_TTL), else None."""
+    if not CATALOG_ENABLED:
+        return None
+    max_age = CATALOG_SEARCH_TTL if max_age is None else max_age
+    key = (site, normalise_query(query), max_per_site)
+    conn = _connect()
+    row = conn.execute(
+        "SELECT fetched_at FROM searches WHERE site = ? AND query = ? AND max_per_site = ?", key
+    ).fetchone()
+    if row is None or row[0] < time.time() - max_age:
+        return None
+    rows = conn.execute(
+        "SELECT url FROM search_results WHERE site = ? AND query = ? AND max_per_site = ? ORDER BY position",
+        key,
+    )
+    return [url for (url,) in rows]
+
+
+## crawler checkpoints (see crawler.py)
+def get_checkpoint(site: str, query: str) -> Optional[Dict[str, Any]]:
+    conn = _connect()
+    row = conn.execute(
+        "SELECT cursor, updated_at, completed_at FROM crawl_checkpoints WHERE site = ? AND query = ?",
+        (site, query),
+    ).fetchone()
+    if row is None:
+        return None
+    return {"cursor": json.loads(row[0]) if row[0] else None, "updated_at": row[1], "completed_at": row[2]}
+
+
+def put_checkpoint(site: str, query: str, cursor: Any, completed_at: Optional[float] = None) -> None:
+    conn = _connect()
+    with _write_lock, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO crawl_checkpoints VALUES (?, ?, ?, ?, ?)",
+            (site, query, json.dumps(cursor) if cursor is not None else None, time.time(), completed_at),
+        )
+
+
+def stats() -> Dict[str, Any]:
+    if not CATALOG_ENABLED:
+        return {"enabled": False}
+    conn = _connect()
+    per_site = dict(conn.execute("SELECT site, COUNT(*) FROM items GROUP BY site").fetchall())
+    searches = conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+    return {"items": per_site, "searches": searches, "hits": hits, "misses": misses}
@@ -0,0 +1,230 @@
+# crawler.py
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import catalog
+from pipeline import fetch_details, is_complete
+from sites import br_1, br_2, hs_1, hs_2, hurr_1, hurr_2, mwhq_1, transport
+
+### background crawler that pre-warms the catalog
+# Walks each platform's listing for CRAWL_QUERIES one page at a time, using
+# the paging the search APIs already have (ByRotation skip, Hirestreet
+# endCursor, HURR and MyWardrobeHQ page numbers). After every page the
+# position is checkpointed in the catalog, so a restarted crawler carries
+# on where it stopped. Items complete from the listing are stored as they
+# are; the others get their details fetched unless the catalog already has
+# a fresh copy. A finished walk starts again after CRAWL_INTERVAL, which
+# re-fetches items that have gone stale since.
+# GirlMeetsDress has no paged listing API, so it isn't crawled.
+#
+# Run with `python crawler.py` (or `--once` for a single pass), or set
+# CRAWLER=true to run it in a thread next to the Flask app.
+
+CRAWLER_ENABLED = os.getenv("CRAWLER", "false").lower() == "true"
+CRAWL_SITES = [s.strip() for s in os.getenv("CRAWL_SITES", "br,hs,hurr,mwhq").split(",") if s.strip()]
+CRAWL_QUERIES = [q.strip() for q in os.getenv("CRAWL_QUERIES", "dress").split(",") if q.strip()]
+# items requested per listing page (ByRotation and MyWardrobeHQ have fixed page sizes)
+CRAWL_PAGE_SIZE = int(os.getenv("CRAWL_PAGE_SIZE", "24"))
+# requests each site may get per CRAWL_BUDGET_WINDOW seconds (listing pages and
+# detail pages actually fetched; cache and catalog hits are free)
+CRAWL_BUDGET = int(os.getenv("CRAWL_BUDGET", "200"))
+CRAWL_BUDGET_WINDOW = float(os.getenv("CRAWL_BUDGET_WINDOW", "3600"))
+# seconds between the end of a full walk of a listing and the next one
+CRAWL_INTERVAL = float(os.getenv("CRAWL_INTERVAL", "21600"))
+# seconds to pause between crawl steps
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "2"))
+
+# one listing page: (partial items, cursor of the next page or None at the end)
+Page = Tuple[List[Dict[str, Any]], Any]
+
+
+## listing walkers: (query, cursor) -> Page, cursor None = first page
+def walk_br(query: str, cursor: Any) -> Page:
+    skip = cursor or 0
+    hits = br_2.fetch_products(query, skip)
+    items = [br_1.hit_to_item(hit) for hit in hits if hit.get("status") == "ACTIVE"]
+    return items, (skip + len(hits) if len(hits) >= br_2.PAGE_SIZE else None)
+
+
+def walk_hs(query: str, cursor: Any) -> Page:
+    result = hs_1.fetch_urls(query, CRAWL_PAGE_SIZE, cursor)
+    items = [
+        hs_2.build_product(f"https://www.hirestreetuk.com/products/{edge['node']['handle']}", edge["node"])
+        for edge in result.get("edges") or []
+    ]
+    page_info = result.get("pageInfo") or {}
+    return items, (page_info.get("endCursor") if page_info.get("hasNextPage") else None)
+
+
+def walk_hurr(query: str, cursor: Any) -> Page:
+    page = cursor or 1
+    data = hurr_1.fetch_hurr(query, CRAWL_PAGE_SIZE, page=page)
+    if not data:
+        raise RuntimeError("no data from the HURR search API") # fetch_hurr swallows the error
+    results = data[0].get("results", [])
+    total_pages = data[0].get("meta", {}).get("page", {}).get("total_pages")
+    more = page < total_pages if total_pages else len(results) >= CRAWL_PAGE_SIZE
+    return [hurr_2.build_product(item) for item in results], (page + 1 if more else None)
+
+
+def walk_mwhq(query: str, cursor: Any) -> Page:
+    page = cursor or 0
+    products = mwhq_1.fetch_products_page(query, page)
+    items = [
+        {"platform": "MyWardrobeHQ", "url": mwhq_1.build_product_url(product)}
+        for product in products if product.get("overallStatus", "").upper() != "SOLD"
+    ]
+    return items, (page + 1 if products else None)
+
+
+WALKERS: Dict[str, Callable[[str, Any], Page]] = {
+    "br": walk_br,
+    "hs": walk_hs,
+    "hurr": walk_hurr,
+    "mwhq": walk_mwhq,
+}
+
+
+class Budget:
+    """
+    Per-site request allowance, refilled every `window` seconds. Work is
+    started while some is left and charged with the requests it really sent
+    (so a step may overrun the limit by the requests of one item).
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._used: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def charge(self, site: str, requests: int) -> None:
+        now = time.time()
+        with self._lock:
+            start, used = self._used.get(site, (now, 0))
+            if now - start >= self.window:
+                start, used = now, 0
+            self._used[site] = (start, used + requests)
+
+    def remaining(self, site: str) -> int:
+        with self._lock:
+            start, used = self._used.get(site, (time.time(), 0))
+            if time.time() - start >= self.window:
+                return self.limit
+            return max(0, self.limit - used)
+
+
+budget = Budget(CRAWL_BUDGET, CRAWL_BUDGET_WINDOW)
+
+
+def _charged(site: str, fn: Callable, *args):
+    """fn(*args), charging site's budget with the HTTP requests it sent."""
+    sent = transport.requests_sent()
+    try:
+        return fn(*args)
+    finally:
+        budget.charge(site, transport.requests_sent() - sent)
+
+
+def crawl_step(site: str, query: str) -> bool:
+    """
+    Crawl the next page of site's listing for query. Returns False if there
+    was nothing to do (walk finished recently, or the budget is spent).
+    """
+    checkpoint = catalog.get_checkpoint(site, query) or {"cursor": None, "completed_at": None}
+    completed_at = checkpoint["completed_at"]
+    if completed_at is not None and completed_at + CRAWL_INTERVAL > time.time():
+        return False
+    if budget.remaining(site) <= 0:
+        return False
+
+    cursor = checkpoint["cursor"]
+    partials, next_cursor = _charged(site, WALKERS[site], query, cursor)
+
+    # hits that already carry every detail field go straight in
+    catalog.put_items(site, [p for p in partials if is_complete(site, p)])
+
+    # the rest need their details, unless the catalog has a fresh copy
+    incomplete = [p for p in partials if not is_complete(site, p)]
+    known = catalog.get_items([p["url"] for p in incomplete])
+    for partial in incomplete:
+        if partial["url"] in known:
+            continue
+        if budget.remaining(site) <= 0:
+            # out of budget mid-page: keep the checkpoint on this page, the
+            # items fetched so far are fresh next time and get skipped
+            return True
+        _charged(site, fetch_details, site, partial["url"], partial) # stores the item in the catalog
+
+    if next_cursor is None:
+        print(f">>> Crawl of {site} '{query}' finished")
+        catalog.put_checkpoint(site, query, None, completed_at=time.time())
+    else:
+        catalog.put_checkpoint(site, query, next_cursor)
+    return True
+
+
+def crawl(stop: Optional[threading.Event] = None, once: bool = False) -> None:
+    """
+    Crawl all CRAWL_SITES x CRAWL_QUERIES listings round-robin until stopped
+    (once=True: until every listing is walked or out of budget).
+    """
+    if not catalog.CATALOG_ENABLED:
+        print(">>> Catalog disabled (CATALOG=false), nothing to crawl into")
+        return
+    stop = stop or threading.Event()
+    listings = [(site, query) for site in CRAWL_SITES if site in WALKERS for query in CRAWL_QUERIES]
+    while not stop.is_set():
+        worked = False
+        for site, query in listings:
+            try:
+                if not crawl_step(site, query):
+                    continue
+                worked = True
+            except Exception as e:
+                # try again on the next round, from the same checkpoint
+                print(f">>> Crawl of {site} '{query}' failed: {e!r}")
+            if stop.wait(CRAWL_DELAY):
+                return
+        if not worked:
+            if once:
+                return
+            stop.wait(60) # everything walked recently or out of budget
+
+
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def start() -> threading.Thread:
+    """Start the crawler in a daemon thread (once per process)."""
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _stop.clear()
+        _thread = threading.Thread(target=crawl, args=(_stop,), daemon=True, name="catalog-crawler")
+        _thread.start()
+    return _thread
+
+
+def stop() -> None:
+    _stop.set()
+
+
+def status() -> Dict[str, Any]:
+    listings = {}
+    for site in CRAWL_SITES:
+        for query in CRAWL_QUERIES:
+            listings[f"{site}|{query}"] = catalog.get_checkpoint(site, query)
+    return {
+        "running": _thread is not None and _thread.is_alive(),
+        "budget_remaining": {site: budget.remaining(site) for site in CRAWL_SITES},
+        "checkpoints": listings,
+    }
+
+
+if __name__ == "__main__":
+    crawl(once="--once" in sys.argv[1:])
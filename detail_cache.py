@@ -0,0 +1,119 @@
+# detail_cache.py
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, urlunparse
+
+from cache import TTLCache
+from sites import transport
+
+# Item details keyed by canonical product url. Entries outlive their TTL so
+# that HTML-backed sites can be revalidated with a conditional GET instead of
+# being downloaded and parsed again.
+DETAIL_CACHE_ENABLED = os.getenv("DETAIL_CACHE", "true").lower() == "true"
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", "2000"))
+DEFAULT_DETAIL_TTL = float(os.getenv("DETAIL_CACHE_TTL", "3600"))
+
+# seconds an entry is served without re-checking the site
+DETAIL_TTLS = {
+    "br": float(os.getenv("DETAIL_TTL_BR", DEFAULT_DETAIL_TTL)),
+    "gmd": float(os.getenv("DETAIL_TTL_GMD", DEFAULT_DETAIL_TTL)),
+    "hs": float(os.getenv("DETAIL_TTL_HS", DEFAULT_DETAIL_TTL)),
+    "hurr": float(os.getenv("DETAIL_TTL_HURR", DEFAULT_DETAIL_TTL)),
+    "mwhq": float(os.getenv("DETAIL_TTL_MWHQ", DEFAULT_DETAIL_TTL)),
+}
+
+_cache = TTLCache(max_entries=DETAIL_CACHE_SIZE)
+revalidated = 0 # expired entries confirmed unchanged by a 304
+
+
+def canonical_url(url: str) -> str:
+    """Lower-case scheme/host, drop query string, fragment and trailing slash."""
+    parsed = urlparse((url or "").strip())
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, "", "", ""))
+
+
+def _is_fresh(site: str, entry: Dict[str, Any]) -> bool:
+    ttl = DETAIL_TTLS.get(site, DEFAULT_DETAIL_TTL)
+    return entry["fetched_at"] + ttl > time.time()
+
+
+def _store(key: str, item: Dict[str, Any], validators: Optional[Dict[str, str]] = None) -> None:
+    # never cache failed scrapes (the {} returns)
+    if item:
+        _cache.set(key, {"item": dict(item), "fetched_at": time.time(), "validators": validators or {}})
+
+
+def get_details(site: str, module_2, url: str) -> Dict[str, Any]:
+    """
+    Return module_2's details for url, from the cache when possible.
+
+    Modules exposing fetch_page/parse_details (gmd_2, mwhq_2, br_2) are
+    fetched here so their ETag/Last-Modified can be kept and expired entries
+    revalidated with a conditional GET; a 304 just renews the entry.
+    Everything else goes through module_2.get_details.
+    """
+    if not DETAIL_CACHE_ENABLED:
+        return module_2.get_details(url)
+
+    global revalidated
+    key = canonical_url(url)
+    entry = _cache.get(key)
+    if entry is not None and _is_fresh(site, entry):
+        return dict(entry["item"]) # copy: ranking adds score fields to items
+
+    if not hasattr(module_2, "fetch_page"):
+        item = module_2.get_details(url)
+        _store(key, item)
+        return item
+
+    validators = entry["validators"] if entry is not None else None
+    response = module_2.fetch_page(url, validators)
+    if response.status_code == 304 and entry is not None:
+        revalidated += 1
+        _store(key, entry["item"], validators)
+        return dict(entry["item"])
+
+    response.raise_for_status()
+    item = module_2.parse_details(url, response.text)
+    if hasattr(module_2, "complete_details"):
+        item = module_2.complete_details(url, item) # extra lookups for what the page lacks (br_2)
+    _store(key, item, transport.response_validators(response))
+    return item
+
+
+def get_details_batch(site: str, module_2, urls: List[str]) -> List[Dict[str, Any]]:
+    """
+    Details for several urls of one site via module_2.get_details_batch,
+    only sending the urls that have no fresh cache entry. Returns items in
+    the same order as urls.
+    """
+    if not DETAIL_CACHE_ENABLED:
+        details = module_2.get_details_batch(urls)
+        return [details.get(url, {}) for url in urls]
+
+    items: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for url in urls:
+        entry = _cache.get(canonical_url(url))
+        if entry is not None and _is_fresh(site, entry):
+            items[url] = dict(entry["item"])
+        else:
+            missing.append(url)
+
+    if missing:
+        details = module_2.get_details_batch(missing)
+        for url in missing:
+            item = details.get(url, {})
+            _store(canonical_url(url), item)
+            items[url] = item
+
+    return [items[url] for url in urls]
+
+
+def cache_stats() -> Dict[str, Any]:
+    stats = _cache.stats()
+    stats["revalidated"] = revalidated
+    return stats
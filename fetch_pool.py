@@ -0,0 +1,121 @@
+# fetch_pool.py
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Tuple
+from urllib.parse import urlparse
+
+
+def host_of(url: str) -> str:
+    """Return the lower-cased host of a url ("" if it has none)."""
+    return urlparse(url or "").netloc.lower()
+
+
+class HostLimitedExecutor:
+    """
+    Thread pool that caps how many tasks run at once in total AND per host.
+
+    Tasks are queued per host and only handed to a worker once both a global
+    slot and a slot for their host are free, so a busy host never ties up
+    workers that could be fetching from another one. Hosts are served
+    round-robin in the order they were first seen.
+
+    Usage:
+        with HostLimitedExecutor(max_workers=8, per_host=2) as pool:
+            futures = [pool.submit(url, fetch, url) for url in urls]
+            results = [f.result() for f in futures]
+    """
+
+    def __init__(self, max_workers: int = 8, per_host: int = 2):
+        self._max_workers = max(1, max_workers)
+        self._per_host = max(1, per_host)
+        self._pool = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queues: Dict[str, Deque[Tuple[Future, Callable, tuple, dict]]] = {}
+        self._active: Dict[str, int] = {}
+        self._running = 0
+        self._shutdown = False
+
+    def submit(self, url: str, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """Queue fn(*args, **kwargs) against the host of url."""
+        future: Future = Future()
+        host = host_of(url)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queues.setdefault(host, deque()).append((future, fn, args, kwargs))
+            ready = self._take_ready()
+        self._start(ready)
+        return future
+
+    def _take_ready(self) -> List[tuple]:
+        # caller must hold self._lock
+        ready = []
+        if self._shutdown:
+            return ready
+        progressed = True
+        while progressed and self._running < self._max_workers:
+            progressed = False
+            for host, queue in self._queues.items():
+                if self._running >= self._max_workers:
+                    break
+                if queue and self._active.get(host, 0) < self._per_host:
+                    ready.append((host,) + queue.popleft())
+                    self._active[host] = self._active.get(host, 0) + 1
+                    self._running += 1
+                    progressed = True
+        return ready
+
+    def _start(self, ready: List[tuple]) -> None:
+        while ready:
+            host, future, fn, args, kwargs = ready.pop(0)
+            if not future.set_running_or_notify_cancel():
+                # cancelled while queued: give the slot to the next task
+                ready.extend(self._release(host))
+                continue
+            inner = self._pool.submit(fn, *args, **kwargs)
+            inner.add_done_callback(lambda f, h=host, outer=future: self._finish(h, outer, f))
+
+    def _release(self, host: str) -> List[tuple]:
+        with self._lock:
+            self._active[host] -= 1
+            self._running -= 1
+            ready = self._take_ready()
+            if not self._running and not ready:
+                self._idle.notify_all()
+            return ready
+
+    def _finish(self, host: str, outer: Future, inner: Future) -> None:
+        self._start(self._release(host))
+        error = inner.exception()
+        if error is not None:
+            outer.set_exception(error)
+        else:
+            outer.set_result(inner.result())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the pool. With wait=True queued tasks are allowed to drain first;
+        with wait=False tasks that have not started yet are cancelled.
+        """
+        cancelled = []
+        with self._idle:
+            if wait:
+                # let queued tasks drain before the worker threads go away
+                self._idle.wait_for(lambda: not self._running and not any(self._queues.values()))
+            self._shutdown = True
+            for queue in self._queues.values():
+                cancelled.extend(task[0] for task in queue)
+                queue.clear()
+        for future in cancelled:
+            future.cancel()
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+        return False
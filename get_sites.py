@@ -1,7 +1,134 @@
 from llm_client import call_llm
 import ast
+import os
+import re
 
-def get_sites(user_input):
+### site selection
+# The five platforms are fixed, so most briefs can be matched to them with a
+# few keyword and budget rules (taken from the platform descriptions in the
+# LLM prompt) without a round trip. The local selector also returns how sure
+# it is; the LLM is only asked when that confidence is below SITE_CONFIDENCE,
+# or always with SITE_SELECTOR=llm (SITE_SELECTOR=local never asks it).
+
+SITE_SELECTOR = os.getenv("SITE_SELECTOR", "auto").lower() # auto / local / llm
+SITE_CONFIDENCE = float(os.getenv("SITE_CONFIDENCE", "0.6"))
+
+# code -> (name, description), in the order results are listed
+PLATFORMS = {
+    "br": ("byrotation", "wide variety"),
+    "gmd": ("girlmeetsdress", "primarily dresses, mid-price"),
+    "hs": ("hirestreet", "casual/semi-formal, budget-friendly"),
+    "hurr": ("hurr", "high-end fashion"),
+    "mwhq": ("mywardrobehq", "luxury fashion"),
+}
+
+# budgets (£) below which the pricier platforms are left out. Rough
+# cut-offs for the prompt's "very low budget", not measured prices: the
+# questionnaire's budget slider starts at £30, so they only drop a site for
+# free-text briefs that name less than that.
+HIGH_END_MIN_BUDGET = 20 # hurr
+LUXURY_MIN_BUDGET = 30 # mwhq
+
+DRESS_WORDS = {"dress", "dresses", "gown", "gowns", "frock", "maxi", "midi", "mini", "slip"}
+GARMENT_WORDS = {
+    "top", "tops", "blouse", "shirt", "tshirt", "t-shirt", "jumper", "cardigan", "knit", "knitwear",
+    "trousers", "jeans", "shorts", "skirt", "jacket", "coat", "blazer", "suit", "jumpsuit", "playsuit",
+    "co-ord", "corset", "bag", "handbag", "clutch", "shoes", "heels", "boots", "outfit",
+}
+OCCASION_WORDS = {
+    "wedding", "party", "gala", "prom", "ball", "races", "ascot", "date", "holiday", "vacation",
+    "work", "office", "festival", "event", "dinner", "birthday", "christening", "graduation",
+    "christmas", "cocktail", "brunch", "interview", "evening", "summer", "winter",
+}
+LUXURY_WORDS = {"luxury", "designer", "high-end", "couture", "black-tie", "premium", "expensive"}
+BUDGET_WORDS = {"cheap", "budget", "affordable", "inexpensive", "low-cost", "bargain", "student"}
+
+_WORD_RE = re.compile(r"[a-z]+(?:-[a-z]+)*")
+# "£40", "40 pounds", "budget of 40", "under 40", "max 40"
+# amounts may use thousands separators ("£1,000")
+_AMOUNT = r"(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+_BUDGET_RE = re.compile(
+    rf"£\s*{_AMOUNT}"
+    rf"|{_AMOUNT}\s*(?:pounds|gbp|quid)\b"
+    rf"|\b(?:budget|under|below|max|maximum|up to|less than)\s*(?:of|is|:)?\s*{_AMOUNT}\b",
+    re.IGNORECASE,
+)
+# the questionnaire sends "Budget: around £80" on its own line
+_BUDGET_LINE_RE = re.compile(rf"^\s*budget\s*:\s*[^\d\n]*{_AMOUNT}", re.IGNORECASE | re.MULTILINE)
+
+
+def _amount(text):
+    """"1,000" -> 1000.0"""
+    return float(text.replace(",", ""))
+
+
+def parse_budget(user_input):
+    """
+    Budget (£) from the brief's "Budget:" line, else the highest amount
+    mentioned as a budget anywhere in it (e.g. "under £40"), else None.
+    """
+    line = _BUDGET_LINE_RE.search(user_input)
+    if line:
+        return _amount(line.group(1))
+    amounts = [_amount(next(g for g in m.groups() if g)) for m in _BUDGET_RE.finditer(user_input)]
+    return max(amounts) if amounts else None
+
+
+def select_sites_locally(user_input):
+    """
+    Rule-based site choice. Returns (sites, confidence 0-1).
+    Like the LLM prompt it is generous: a platform is only left out when
+    the brief clearly rules it out.
+    """
+    text = user_input.lower().replace("black tie", "black-tie").replace("high end", "high-end")
+    words = set(_WORD_RE.findall(text))
+    budget = parse_budget(user_input)
+    sites = list(PLATFORMS)
+    confidence = 1.0
+
+    # girlmeetsdress only when a dress could be what is wanted
+    wants_dress = bool(words & DRESS_WORDS)
+    wants_other = bool(words & GARMENT_WORDS)
+    if wants_other and not wants_dress:
+        sites.remove("gmd")
+    elif not wants_dress and not (words & OCCASION_WORDS):
+        # neither garment nor occasion recognised: nothing to go on
+        confidence -= 0.5
+
+    # drop the pricier platforms only for very low budgets
+    if budget is not None:
+        if budget < LUXURY_MIN_BUDGET:
+            sites.remove("mwhq")
+        if budget < HIGH_END_MIN_BUDGET:
+            sites.remove("hurr")
+    elif words & BUDGET_WORDS:
+        # "cheap" without an amount is a judgement call
+        confidence -= 0.3
+
+    tight = budget < LUXURY_MIN_BUDGET if budget is not None else bool(words & BUDGET_WORDS)
+    if tight and words & LUXURY_WORDS:
+        # asks for luxury on a tight budget
+        confidence -= 0.4
+
+    return sites, max(0.0, round(confidence, 2))
+
+
+def parse_site_list(raw_response):
+    """Known site codes from the first [...] list in an LLM reply (None if there is none)."""
+    match = re.search(r"\[[^\[\]]*\]", raw_response)
+    if match is None:
+        return None
+    try:
+        codes = ast.literal_eval(match.group(0))
+    except (ValueError, SyntaxError):
+        return None
+    if not isinstance(codes, (list, tuple)):
+        return None
+    sites = [code for code in PLATFORMS if code in codes]
+    return sites or None
+
+
+def get_sites_llm(user_input):
     system_prompt = (
         "Your task is to read a user's requirements and decide which of the listed possible fashion rental platforms are most suitable.\n"
         "Be generous in your selection choice, only excluding platforms which are clearly not suitable.\n"
@@ -12,11 +139,10 @@ def get_sites(user_input):
         "OUTPUT FORMAT:\n"
         "[\"platform1\",\"platform2\",\"platform3\"]\n"
         "Possible fashion rental platforms:\n"
-        "CODE: \"br\", NAME: \"byrotation\", DESCRIPTION: wide variety\n"
-        "CODE: \"gmd\", NAME: \"girlmeetsdress\", DESCRIPTION: primarily dresses, mid-price\n"
-        "CODE: \"hs\", NAME: \"hirestreet\", DESCRIPTION: casual/semi-formal, budget-friendly\n"
-        "CODE: \"hurr\", NAME: \"hurr\", DESCRIPTION: high-end fashion\n"
-        "CODE: \"mwhq\", NAME: \"mywardrobehq\", DESCRIPTION: luxury fashion\n"
+        + "".join(
+            f"CODE: \"{code}\", NAME: \"{name}\", DESCRIPTION: {description}\n"
+            for code, (name, description) in PLATFORMS.items()
+        )
     )
 
     user_msg = (
@@ -31,9 +157,32 @@ def get_sites(user_input):
         max_tokens=512,
     )
 
-    parts = raw_response.split()
-    sites = ast.literal_eval(parts[0])
-
     print(raw_response)
 
-    return sites
\ No newline at end of file
+    # None when the reply has no usable list (e.g. call_llm's error fallback)
+    return parse_site_list(raw_response)
+
+
+def choose_locally(user_input):
+    """Local site choice, and whether it settles the question without the LLM."""
+    sites, confidence = select_sites_locally(user_input)
+    settled = SITE_SELECTOR == "local" or (SITE_SELECTOR != "llm" and confidence >= SITE_CONFIDENCE)
+    if settled:
+        print(f">>> Sites chosen locally (confidence {confidence}): {sites}")
+    return sites, settled
+
+
+def get_sites(user_input):
+    sites, settled = choose_locally(user_input)
+    if settled:
+        return sites
+
+    try:
+        llm_sites = get_sites_llm(user_input)
+    except Exception as e:
+        print(f">>> Site selection LLM call failed: {e!r}")
+        llm_sites = None
+    if llm_sites is None:
+        print(f">>> No site list from the LLM, using the local choice: {sites}")
+        return sites
+    return llm_sites
@@ -1,34 +1,42 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+import os
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
 from parse_input import parse_input
 from get_sites import get_sites
-from rank_items import rank_items
-from sites import gmd_1, gmd_2, br_1, br_2, hs_1, hs_2, hurr_1, hurr_2, mwhq_1, mwhq_2
-
-# initialise scraper modules for each site
-SITE_MODULES = {
-    "gmd_1": gmd_1,
-    "gmd_2": gmd_2,
-    "br_1": br_1,
-    "br_2": br_2,
-    "hs_1": hs_1,
-    "hs_2": hs_2, # does not work
-    "hurr_1": hurr_1,
-    "hurr_2": hurr_2,
-    "mwhq_1": mwhq_1,
-    "mwhq_2": mwhq_2
-}
+from plan_search import plan_search
+from rank_items import rank_items, TopKRanker
+from fetch_pool import HostLimitedExecutor
+from pipeline import (
+    SITE_MODULES, SEARCH_WORKERS, SEARCH_TIMEOUT, DETAIL_WORKERS, DETAIL_PER_HOST,
+    search_site, fetch_details, fetch_details_batch, use_batch, stream_items,
+)
+
+# stream searches straight into detail fetching and scoring instead of
+# running find_item_urls_step, get_item_details_step and rank_items_step
+# one after the other
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "true").lower() == "true"
+# turn the brief into a search query and choose the sites in one LLM call
+# (plan_step) instead of parse_input_step and get_sites_step
+COMBINED_PLANNER = os.getenv("COMBINED_PLANNER", "true").lower() == "true"
+# ranked items kept (the frontend shows 10 and the LLM re-ranks 10), also
+# the size of the provisional rankings reported while items are still arriving
+TOP_K = 10
 
 # define the shared state for the pipeline
+# (nodes that run in parallel must return disjoint keys: plain fields keep only
+# one value per step, so two branches writing the same field is an error)
 @dataclass
 class AgentState:
     user_input: Optional[str] = None
     parsed_input: Optional[str] = None
     sites: List[str] = field(default_factory=list)
     item_urls: List[Dict[str,str]] = field(default_factory=list)
+    partial_items: Dict[str, Dict[str, Any]] = field(default_factory=dict) # url -> fields already known from search
     items: List[Dict[str, Any]] = field(default_factory=list)
-    ranked_items: List[Dict[str, Any]] = field(default_factory=list)
+    ranked_items: List[Dict[str, Any]] = field(default_factory=list) # best TOP_K items, best first
 
 ### node functions
 
@@ -42,65 +50,178 @@ def get_sites_step(state: dict):
     sites = get_sites(state.user_input)
     return {"sites": sites}
 
+## search query and sites together (COMBINED_PLANNER)
+def plan_step(state: dict):
+    return plan_search(state.user_input)
+
 ## find list of item urls from all sites
 def find_item_urls_step(state: dict):
     item_urls = []
     max_per_site = 5
-
-    ## iterate over each site
-    for site in state.sites:
-        # find site's corresponding scraper
-        module_1 = SITE_MODULES.get(site + "_1")
-        if module_1 is None:
-            print(f"No model found for site: {site}")
-            continue # no scraper module found
-
-        # call site's scraper function with user input
-        urls = module_1.get_item_urls(state.parsed_input, max_per_site)
-
-        for url in urls:
-            item_urls.append({"site": site, "url": url})
-
-    return {"item_urls": item_urls}
-
-## get individual item details from urls (dummy code)
+    sites = list(state.sites)
+
+    ## search all sites concurrently (or one at a time if SEARCH_WORKERS <= 1)
+    if SEARCH_WORKERS > 1 and len(sites) > 1:
+        pool = ThreadPoolExecutor(max_workers=min(SEARCH_WORKERS, len(sites)))
+        futures = [pool.submit(search_site, site, state.parsed_input, max_per_site) for site in sites]
+        done, _ = wait(futures, timeout=SEARCH_TIMEOUT)
+        # don't block on sites that are still running past the timeout
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        results = []
+        for site, future in zip(sites, futures):
+            if future in done:
+                results.append(future.result())
+            else:
+                print(f"Search timed out for site: {site}")
+                results.append([])
+    else:
+        results = [search_site(site, state.parsed_input, max_per_site) for site in sites]
+
+    # keep site order from state.sites, then url order within each site
+    partial_items = {}
+    for site, partials in zip(sites, results):
+        for partial in partials:
+            item_urls.append({"site": site, "url": partial["url"]})
+            partial_items[partial["url"]] = partial
+
+    return {"item_urls": item_urls, "partial_items": partial_items}
+
+## get individual item details from urls
 def get_item_details_step(state: dict):
     items = []
-
-    # iterate over each item url
-    for item_url in state.item_urls:
-        site = item_url.get("site")
-        module_2 = SITE_MODULES.get(site + "_2")
-        if module_2 is None:
-            print(f"No model found for site: {site}")
-            continue # no scraper module found
-
-        # call site's item scraper function
-        item = module_2.get_details(item_url.get("url"))
+    item_urls = [(item_url.get("site"), item_url.get("url")) for item_url in state.item_urls]
+    partials = [state.partial_items.get(url) or {"url": url} for _, url in item_urls]
+
+    # sites whose scraper can resolve several urls in one request
+    batches: Dict[str, List[int]] = {}
+    for index, (site, url) in enumerate(item_urls):
+        batches.setdefault(site, []).append(index)
+    batches = {
+        site: indices for site, indices in batches.items()
+        if use_batch(site, [partials[i] for i in indices])
+    }
+    batched = {i for indices in batches.values() for i in indices}
+
+    ## fetch pages concurrently, capped overall and per host
+    results = [None] * len(item_urls)
+    if DETAIL_WORKERS > 1 and len(item_urls) > 1:
+        with HostLimitedExecutor(max_workers=DETAIL_WORKERS, per_host=DETAIL_PER_HOST) as pool:
+            batch_futures = {
+                site: pool.submit(item_urls[indices[0]][1], fetch_details_batch, site, [partials[i] for i in indices])
+                for site, indices in batches.items()
+            }
+            futures = {
+                index: pool.submit(url, fetch_details, site, url, partials[index])
+                for index, (site, url) in enumerate(item_urls) if index not in batched
+            }
+            for index, future in futures.items():
+                results[index] = future.result()
+            for site, future in batch_futures.items():
+                for index, item in zip(batches[site], future.result()):
+                    results[index] = item
+    else:
+        for site, indices in batches.items():
+            for index, item in zip(indices, fetch_details_batch(site, [partials[i] for i in indices])):
+                results[index] = item
+        for index, (site, url) in enumerate(item_urls):
+            if index not in batched:
+                results[index] = fetch_details(site, url, partials[index])
+
+    # keep the original url order
+    for item in results:
+        if item is None:
+            continue
         items.append(item)
 
+    # report each site's items to stream_mode="custom" listeners
+    writer = get_stream_writer()
+    for site in dict.fromkeys(site for site, _ in item_urls):
+        site_items = [item for (s, _), item in zip(item_urls, results) if s == site and item is not None]
+        writer({"event": "site_items", "site": site, "items": site_items})
+
     return {"items": items}
 
 ## score and rank items
 def rank_items_step(state: dict):
-    ranked = rank_items(state.user_input, state.items)
+    ranked = rank_items(state.user_input, state.items, top_k=TOP_K)
     return {"ranked_items": ranked}
 
+## search, fetch and score items as one streaming pipeline (PIPELINE_MODE)
+def scrape_and_rank_step(state: dict):
+    max_per_site = 5
+    urls_by_position = {}
+    items_by_position = {}
+    # items still to come per site, so a site's items are reported (to
+    # stream_mode="custom" listeners) as soon as its last one is scraped,
+    # together with the provisional top k so far
+    writer = get_stream_writer()
+    remaining = {}
+    ranker = TopKRanker(state.user_input, k=TOP_K)
+
+    def report_site(site_index, site):
+        site_items = [
+            items_by_position[p] for p in sorted(items_by_position) if p[0] == site_index
+        ]
+        writer({"event": "site_items", "site": site, "items": site_items})
+        if len(ranker):
+            writer({"event": "provisional", "ranked_items": ranker.ranking()})
+
+    for event in stream_items(list(state.sites), state.parsed_input, max_per_site):
+        site_index = event.position[0]
+        if event.kind == "urls":
+            for url_index, url in enumerate(event.urls):
+                urls_by_position[(site_index, url_index)] = {"site": event.site, "url": url}
+            remaining[site_index] = len(event.urls)
+        else:
+            if event.item is not None:
+                # score each item as soon as it lands, overlapping with scraping
+                # (ties broken by position, as in the staged steps)
+                items_by_position[event.position] = ranker.add(event.item, order=event.position)
+            remaining[site_index] -= 1
+        if remaining[site_index] == 0:
+            report_site(site_index, event.site)
+
+    # same order the staged steps produce: site order, then url order
+    item_urls = [urls_by_position[p] for p in sorted(urls_by_position)]
+    items = [items_by_position[p] for p in sorted(items_by_position)]
+    # the ranker already holds the final top k, nothing left to sort
+    ranked = ranker.ranking()
+
+    return {"item_urls": item_urls, "items": items, "ranked_items": ranked}
+
 ### build graph
 
 graph = StateGraph(AgentState)
 ## add nodes
-graph.add_node("parse_input_step", parse_input_step)
-graph.add_node("get_sites_step", get_sites_step)
-graph.add_node("find_item_urls_step", find_item_urls_step)
-graph.add_node("get_item_details_step", get_item_details_step)
-graph.add_node("rank_items_step", rank_items_step)
-## connect nodes through edges (fully sequential)
-graph.add_edge(START, "parse_input_step")
-graph.add_edge("parse_input_step", "get_sites_step")
-graph.add_edge("get_sites_step", "find_item_urls_step")
-graph.add_edge("find_item_urls_step", "get_item_details_step")
-graph.add_edge("get_item_details_step", "rank_items_step")
-graph.add_edge("rank_items_step", END)
+if COMBINED_PLANNER:
+    graph.add_node("plan_step", plan_step)
+    planning = "plan_step"
+else:
+    graph.add_node("parse_input_step", parse_input_step)
+    graph.add_node("get_sites_step", get_sites_step)
+    planning = ["parse_input_step", "get_sites_step"]
+if PIPELINE_MODE:
+    graph.add_node("scrape_and_rank_step", scrape_and_rank_step)
+else:
+    graph.add_node("find_item_urls_step", find_item_urls_step)
+    graph.add_node("get_item_details_step", get_item_details_step)
+    graph.add_node("rank_items_step", rank_items_step)
+## connect nodes through edges
+if COMBINED_PLANNER:
+    graph.add_edge(START, "plan_step")
+else:
+    # parse_input_step and get_sites_step only read user_input and write different
+    # keys, so they run as parallel branches and join before the site searches
+    graph.add_edge(START, "parse_input_step")
+    graph.add_edge(START, "get_sites_step")
+if PIPELINE_MODE:
+    graph.add_edge(planning, "scrape_and_rank_step")
+    graph.add_edge("scrape_and_rank_step", END)
+else:
+    graph.add_edge(planning, "find_item_urls_step")
+    graph.add_edge("find_item_urls_step", "get_item_details_step")
+    graph.add_edge("get_item_details_step", "rank_items_step")
+    graph.add_edge("rank_items_step", END)
 # compile graph for execution
 graph = graph.compile()
\ No newline at end of file
@@ -0,0 +1,194 @@
+# item.py
+
+from typing import Any, Dict, Iterator, List, Optional
+
+### normalised item record
+# Every site's get_details returns a differently shaped dict (rental_3days
+# for br, hire_prices for gmd, rental_periods for hurr, rental_prices for hs,
+# hire_price for mwhq). The pipeline turns each one into an Item: fixed
+# __slots__ fields for what ranking and the frontend read, including an
+# effective rental price, plus the site-specific fields in `extra`. Items
+# also answer .get() / [] like the dicts they replace, so code written
+# against item dicts keeps working; to_dict() is the serialised form.
+
+PLATFORMS = {
+    "br": "ByRotation",
+    "gmd": "GirlMeetsDress",
+    "hs": "Hirestreet",
+    "hurr": "HURR",
+    "mwhq": "MyWardrobeHQ",
+}
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, dict):
+        value = value.get("amount")
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _lowest(values) -> Optional[float]:
+    numbers = [n for n in (_number(v) for v in values) if n is not None]
+    return min(numbers) if numbers else None
+
+
+def rental_price(site: str, details: Dict[str, Any]) -> Optional[float]:
+    """Price of the shortest rental on offer (£), from whichever fields site fills in."""
+    if site == "br":
+        # per-day rates with a minimum rental length
+        for days in (3, 7, 28):
+            rate = _number(details.get(f"rental_{days}days"))
+            if rate is not None:
+                return round(rate * days, 2)
+        return None
+    if site == "gmd":
+        return _lowest(p.get("price") for p in details.get("hire_prices") or [] if isinstance(p, dict))
+    if site == "hurr":
+        return _lowest(p.get("total_price") for p in details.get("rental_periods") or [] if isinstance(p, dict))
+    if site == "hs":
+        return _number(details.get("rental_prices"))
+    if site == "mwhq":
+        return _number(details.get("hire_price"))
+    return _number(details.get("price"))
+
+
+def size_labels(details: Dict[str, Any]) -> List[str]:
+    """Size labels from whichever of size/sizes the site fills in."""
+    values = details.get("sizes")
+    values = list(values) if isinstance(values, list) else []
+    if details.get("size") is not None:
+        values.append(details["size"])
+    sizes = []
+    for value in values:
+        if isinstance(value, dict):
+            value = value.get("size") or value.get("name") or value.get("label")
+        if isinstance(value, (str, int, float)) and str(value).strip():
+            sizes.append(str(value).strip())
+    return list(dict.fromkeys(sizes))
+
+
+def image_urls(details: Dict[str, Any]) -> List[str]:
+    images = details.get("images")
+    if not isinstance(images, list):
+        images = [details.get("image")]
+    urls = []
+    for image in images:
+        if isinstance(image, dict):
+            image = image.get("url") or image.get("src")
+        if isinstance(image, str) and image and image not in urls:
+            urls.append(image)
+    return urls
+
+
+# site fields folded into a normalised field (and not kept in Item.extra)
+ALIASES = {"designer": "brand", "image": "images", "size": "sizes"}
+
+
+class Item:
+    """
+    One rental listing in a fixed shape.
+
+    - price: effective rental price (shortest rental, £), None if unknown
+    - delivery: delivery time as scraped (None if the site's page doesn't give one)
+    - *_score: set by rank_items
+    - extra: the site-specific fields (and anything else set by key)
+    """
+
+    FIELDS = (
+        "site", "platform", "url", "title", "brand", "description", "sizes", "images",
+        "retail_price", "price", "delivery",
+        "price_score", "delivery_score", "similarity_score", "total_score",
+    )
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields: Any):
+        for name in self.FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        self.extra: Dict[str, Any] = fields
+
+    @classmethod
+    def from_details(cls, site: str, details: Dict[str, Any]) -> "Item":
+        """Normalise one site's details dict (as returned by its get_details)."""
+        return cls(
+            site=site,
+            platform=details.get("platform") or PLATFORMS.get(site),
+            url=details.get("url"),
+            title=details.get("title"),
+            brand=details.get("brand") or details.get("designer"),
+            description=details.get("description"),
+            sizes=size_labels(details),
+            images=image_urls(details),
+            retail_price=_number(details.get("retail_price")),
+            price=rental_price(site, details),
+            # only what the page says: an empty (failed) scrape must not score
+            delivery=details.get("delivery"),
+            # everything else (hire_prices, rental_periods, ...) as is
+            **{k: v for k, v in details.items() if k not in cls.FIELDS and k not in ALIASES},
+        )
+
+    ## dict-style access, so code written for item dicts keeps working
+    def get(self, key: str, default: Any = None) -> Any:
+        key = ALIASES.get(key, key)
+        if key in Item.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        key = ALIASES.get(key, key)
+        if key in Item.FIELDS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in Item.FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        key = ALIASES.get(key, key)
+        if key in Item.FIELDS:
+            return getattr(self, key) is not None
+        return key in self.extra
+
+    def keys(self) -> Iterator[str]:
+        for name in self.FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        yield from self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for JSON: the site's own fields plus the normalised ones."""
+        data = dict(self.extra)
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Item) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Item({self.site!r}, {self.url!r}, price={self.price!r})"
+
+
+def as_dict(value: Any) -> Any:
+    """Serialise Items (also inside lists/dicts) to plain dicts for JSON."""
+    if isinstance(value, Item):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [as_dict(v) for v in value]
+    if isinstance(value, dict):
+        return {k: as_dict(v) for k, v in value.items()}
+    return value
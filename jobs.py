@@ -0,0 +1,118 @@
+# jobs.py
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from cache import TTLCache
+from recommend import shared_recommend_events
+
+### background recommendation jobs
+# POST /api/jobs queues a brief here and returns straight away; the job runs
+# on a small worker pool and GET /api/jobs/<id> reads its status, progress
+# and (once done) the same payload /api/recommend returns.
+
+# recommendations computed at once (the rest wait in the queue)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# jobs kept for polling, and for how long (seconds) after they were created
+JOB_MAX = int(os.getenv("JOB_MAX", "1000"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+
+# workflow steps reported as progress, in the order they finish
+# (plan_step, or parse_input_step and get_sites_step in parallel, so either may be first)
+STEP_NAMES = {
+    "plan_step": "Understood the brief and chose rental sites",
+    "parse_input_step": "Understood the brief",
+    "get_sites_step": "Chose rental sites",
+    "find_item_urls_step": "Searched sites",
+    "get_item_details_step": "Fetched item details",
+    "rank_items_step": "Scored items",
+    "scrape_and_rank_step": "Searched sites and scored items",
+    "llm_ranking_step": "Re-ranking with the LLM",
+}
+
+_jobs = TTLCache(max_entries=JOB_MAX, ttl=JOB_TTL)
+_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix="recommend-job")
+
+
+def _update(job: Dict[str, Any], **fields: Any) -> None:
+    with _lock:
+        job.update(fields)
+        job["updated"] = time.time()
+
+
+def _on_event(job: Dict[str, Any], event: str, data: Dict[str, Any]) -> None:
+    with _lock:
+        progress = job["progress"]
+        if event == "step":
+            progress["steps"].append(data["step"])
+            progress["message"] = STEP_NAMES.get(data["step"], data["step"])
+        # partial results worth showing while the job is still running
+        elif event == "parsed_query":
+            progress["parsed_input"] = data["parsed_input"]
+        elif event == "sites":
+            progress["sites"] = data["sites"]
+        elif event == "site_items":
+            progress["items_found"] = progress.get("items_found", 0) + len(data["items"])
+        elif event == "provisional":
+            progress["provisional"] = data["ranked_items"]
+        job["updated"] = time.time()
+
+
+def _run(job: Dict[str, Any]) -> None:
+    _update(job, status="running", started=time.time())
+    result = None
+    try:
+        for event, data in shared_recommend_events(job["user_input"], job["trace"]):
+            if event == "result":
+                result = data
+            else:
+                _on_event(job, event, data)
+    except Exception as e:
+        print(f">>> Job {job['id']} failed: {e!r}")
+        with _lock:
+            job["progress"]["message"] = "Failed"
+        _update(job, status="failed", error=str(e), finished=time.time())
+        return
+    with _lock:
+        job["progress"]["message"] = "Done"
+    _update(job, status="done", result=result, finished=time.time())
+
+
+def submit(user_input: str, trace: Optional[str] = None) -> Dict[str, Any]:
+    """Queue a recommendation for user_input and return a snapshot of the new job."""
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "user_input": user_input,
+        "trace": trace,
+        "progress": {"steps": [], "message": "Waiting for a worker"},
+        "result": None,
+        "error": None,
+        "created": time.time(),
+        "updated": time.time(),
+    }
+    _jobs.set(job["id"], job)
+    _pool.submit(_run, job)
+    return snapshot(job["id"])
+
+
+def snapshot(job_id: str) -> Optional[Dict[str, Any]]:
+    """Copy of a job's public fields (None if unknown or expired)."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+    with _lock:
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "progress": {**job["progress"], "steps": list(job["progress"]["steps"])},
+            "result": job["result"],
+            "error": job["error"],
+            "created": job["created"],
+            "updated": job["updated"],
+        }
@@ -2,10 +2,12 @@
 
 import os
 import requests
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 
+from cache import TTLCache, DiskCache, make_key
+
 env_path = Path(__file__).resolve().parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
@@ -24,6 +26,21 @@ print(
 # Recommended model from the hackathon
 DEFAULT_MODEL = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
 
+# Response cache: identical prompts (same messages, model, max_tokens) are
+# answered locally instead of going back to the proxy.
+# LLM_CACHE_DIR enables an extra on-disk tier shared across restarts.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+_memory_cache = TTLCache(max_entries=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+_disk_cache: Optional[DiskCache] = (
+    DiskCache(LLM_CACHE_DIR, ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES)
+    if LLM_CACHE_DIR else None
+)
+
 
 def _to_bedrock_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """
@@ -57,15 +74,36 @@ def _to_bedrock_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]
     ]
 
 
+def _cache_key(bedrock_messages: List[Dict[str, str]], model: str, max_tokens: int) -> str:
+    """Hash of the whitespace-normalised messages plus model and max_tokens."""
+    normalised = [
+        {"role": m.get("role"), "content": " ".join((m.get("content") or "").split())}
+        for m in bedrock_messages
+    ]
+    return make_key(normalised, model, max_tokens)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the LLM response cache tiers."""
+    return {
+        "enabled": LLM_CACHE_ENABLED,
+        "memory": _memory_cache.stats(),
+        "disk": _disk_cache.stats() if _disk_cache else None,
+    }
+
+
 def call_llm(
     messages: List[Dict[str, str]],
     model: str = DEFAULT_MODEL,
     max_tokens: int = 128,
+    use_cache: bool = True,
 ) -> str:
     """
     Thin wrapper around the Holistic AI Bedrock proxy.
     Returns only the assistant text (or a JSON string fallback),
     not the full JSON response.
+
+    Successful responses are cached by prompt; the error fallbacks never are.
     """
     if not API_ENDPOINT:
         raise RuntimeError("API_ENDPOINT not set in environment/.env")
@@ -81,6 +119,18 @@ def call_llm(
     # Convert our system+user messages to the simple user-only format
     bedrock_messages = _to_bedrock_messages(messages)
 
+    use_cache = use_cache and LLM_CACHE_ENABLED
+    if use_cache:
+        key = _cache_key(bedrock_messages, model, max_tokens)
+        cached = _memory_cache.get(key)
+        if cached is None and _disk_cache is not None:
+            cached = _disk_cache.get(key)
+            if cached is not None:
+                _memory_cache.set(key, cached)
+        if cached is not None:
+            print(">>> LLM cache hit")
+            return cached
+
     # Match the working demo script payload shape
     payload = {
         "team_id": TEAM_ID,
@@ -136,4 +186,10 @@ def call_llm(
             '"explanation": "LLM call returned no text content, using top rule-based item."}'
         )
 
+    # only real model output reaches this point, so it is safe to cache
+    if use_cache:
+        _memory_cache.set(key, text)
+        if _disk_cache is not None:
+            _disk_cache.set(key, text)
+
     return text
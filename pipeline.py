@@ -0,0 +1,278 @@
+# pipeline.py
+
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import catalog
+import detail_cache
+import search_cache
+from fetch_pool import HostLimitedExecutor
+from item import Item
+from sites import gmd_1, gmd_2, br_1, br_2, hs_1, hs_2, hurr_1, hurr_2, mwhq_1, mwhq_2
+
+# initialise scraper modules for each site
+SITE_MODULES = {
+    "gmd_1": gmd_1,
+    "gmd_2": gmd_2,
+    "br_1": br_1,
+    "br_2": br_2,
+    "hs_1": hs_1,
+    "hs_2": hs_2, # does not work
+    "hurr_1": hurr_1,
+    "hurr_2": hurr_2,
+    "mwhq_1": mwhq_1,
+    "mwhq_2": mwhq_2
+}
+
+# number of site searches run at once (1 = sequential)
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "5"))
+# seconds to wait for the slowest site search before moving on without it
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "25"))
+# number of item pages fetched at once, overall and per host (1 = sequential)
+DETAIL_WORKERS = int(os.getenv("DETAIL_WORKERS", "8"))
+DETAIL_PER_HOST = int(os.getenv("DETAIL_PER_HOST", "2"))
+# seconds stream_items waits for outstanding item details once all searches are in
+DETAIL_TIMEOUT = float(os.getenv("DETAIL_TIMEOUT", "30"))
+
+
+## search a single site, returning items with at least a "url"
+# (sites whose search API returns rich hits fill in more fields here)
+def search_site(site: str, query: str, max_per_site: int) -> List[Dict[str, Any]]:
+    # find site's corresponding scraper
+    module_1 = SITE_MODULES.get(site + "_1")
+    if module_1 is None:
+        print(f"No model found for site: {site}")
+        return [] # no scraper module found
+
+    if hasattr(module_1, "get_items"):
+        search = module_1.get_items
+    else:
+        search = lambda q, n: [{"url": url} for url in module_1.get_item_urls(q, n)]
+
+    # answer from the local catalog if this search was run recently
+    # (the catalog is only a cache: if it can't be read, search live)
+    try:
+        urls = catalog.get_search(site, query, max_per_site)
+        if urls is not None:
+            known = catalog.get_items(urls)
+            return [known.get(url) or {"url": url} for url in urls]
+    except Exception as e:
+        print(f"Catalog read failed for site {site}: {e!r}")
+
+    try:
+        # call site's scraper function with user input (through the search cache)
+        partials, fetched_at = search_cache.get_items_fetched_at(site, search, query, max_per_site)
+    except Exception as e:
+        # a failing site should not take the others down with it
+        print(f"Search failed for site {site}: {e!r}")
+        return []
+
+    try:
+        # with the search's own age: a stale cached copy must not look fresh
+        catalog.put_search(site, query, max_per_site, [partial["url"] for partial in partials], fetched_at)
+    except Exception as e:
+        print(f"Catalog write failed for site {site}: {e!r}")
+    _catalog_store(site, [partial for partial in partials if is_complete(site, partial)])
+    return partials
+
+## whether a partial item from search already has every field get_details returns
+def is_complete(site: str, partial: Optional[Dict[str, Any]]) -> bool:
+    fields = getattr(SITE_MODULES.get(site + "_2"), "DETAIL_FIELDS", None)
+    return bool(partial) and fields is not None and all(f in partial for f in fields)
+
+## fill a partial item's missing fields from the scraped details
+def merge_partial(partial: Optional[Dict[str, Any]], item: Dict[str, Any]) -> Dict[str, Any]:
+    if not partial:
+        return item
+    merged = dict(item)
+    for key, value in partial.items():
+        if value is not None or key not in merged:
+            merged[key] = value
+    return merged
+
+## catalog reads and writes that never fail the scrape: a failed read is a
+# miss, a failed write is only logged
+def _catalog_items(site: str, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    try:
+        return catalog.get_items(urls)
+    except Exception as e:
+        print(f"Catalog read failed for site {site}: {e!r}")
+        return {}
+
+def _catalog_store(site: str, items: List[Dict[str, Any]]) -> None:
+    try:
+        catalog.put_items(site, items)
+    except Exception as e:
+        print(f"Catalog write failed for site {site}: {e!r}")
+
+## fetch a single item's details, as a normalised Item
+def fetch_details(site: str, url: str, partial: Optional[Dict[str, Any]] = None) -> Optional[Item]:
+    module_2 = SITE_MODULES.get(site + "_2")
+    if module_2 is None:
+        print(f"No model found for site: {site}")
+        return None # no scraper module found
+
+    # nothing left to fetch for items fully hydrated from the search hit
+    if is_complete(site, partial):
+        return Item.from_details(site, partial)
+
+    # call site's item scraper function (catalog first, then through the detail cache)
+    item = _catalog_items(site, [url]).get(url)
+    if item is None:
+        try:
+            item = detail_cache.get_details(site, module_2, url)
+        except Exception as e:
+            # keep failures to this url only, like the scrapers' own {} returns
+            print(f"Details failed for {url}: {e!r}")
+            item = {}
+        _catalog_store(site, [item])
+    return Item.from_details(site, merge_partial(partial, item))
+
+## fetch several items of one site in a single batched request
+def fetch_details_batch(site: str, partials: List[Dict[str, Any]]) -> List[Item]:
+    module_2 = SITE_MODULES.get(site + "_2")
+    missing = [p["url"] for p in partials if not is_complete(site, p)]
+    details = {}
+    if missing:
+        details = _catalog_items(site, missing)
+        missing = [url for url in missing if url not in details]
+        if missing:
+            try:
+                fetched = detail_cache.get_details_batch(site, module_2, missing)
+                details.update(zip(missing, fetched))
+                _catalog_store(site, fetched)
+            except Exception as e:
+                print(f"Batch details failed for site {site}: {e!r}")
+
+    return [
+        Item.from_details(site, p if is_complete(site, p) else merge_partial(p, details.get(p["url"], {})))
+        for p in partials
+    ]
+
+## whether a site's items should be fetched with one batched request
+def use_batch(site: str, partials: List[Dict[str, Any]]) -> bool:
+    module_2 = SITE_MODULES.get(site + "_2")
+    return len(partials) > 1 and hasattr(module_2, "get_details_batch")
+
+
+class PipelineEvent(NamedTuple):
+    """
+    One step of stream_items:
+    - kind="urls": a site's search finished; `urls` holds its item urls
+    - kind="item": one item's details finished; `url` and `item` are set
+    `position` is (site index, url index) so callers can restore the same
+    order the staged find/details steps would have produced.
+    """
+    kind: str
+    site: str
+    position: Tuple[int, int]
+    urls: Optional[List[str]] = None
+    url: Optional[str] = None
+    item: Optional[Item] = None
+
+
+def stream_items(sites: List[str], query: str, max_per_site: int) -> Iterator[PipelineEvent]:
+    """
+    Search all sites and fetch item details as one streaming pipeline.
+
+    As soon as a site's search returns, its urls are queued for detail
+    fetching (capped overall and per host), so a fast site's items are
+    being scraped while slower sites are still searching. Events are
+    yielded in completion order.
+    """
+    events: "queue.Queue[PipelineEvent]" = queue.Queue()
+    search_pool = ThreadPoolExecutor(max_workers=max(1, min(SEARCH_WORKERS, len(sites) or 1)))
+    detail_pool = HostLimitedExecutor(max_workers=DETAIL_WORKERS, per_host=DETAIL_PER_HOST)
+
+    # every announced url must get exactly one "item" event (item=None if its
+    # fetch failed), or the consumer would wait for it forever
+    def on_item(site, position, url, future):
+        if future.cancelled():
+            return # pipeline was closed before this item started
+        try:
+            item = future.result()
+        except Exception as e:
+            print(f"Details failed for {url}: {e!r}")
+            item = None
+        events.put(PipelineEvent("item", site, position, url=url, item=item))
+
+    def on_batch(site, site_index, urls, future):
+        if future.cancelled():
+            return
+        try:
+            items = list(future.result())
+        except Exception as e:
+            print(f"Batch details failed for site {site}: {e!r}")
+            items = []
+        items += [None] * (len(urls) - len(items))
+        for url_index, (url, item) in enumerate(zip(urls, items)):
+            events.put(PipelineEvent("item", site, (site_index, url_index), url=url, item=item))
+
+    def run_search(site_index, site):
+        partials = search_site(site, query, max_per_site)
+        urls = [partial["url"] for partial in partials]
+        # hand urls to the detail pool before announcing them, so the consumer
+        # always knows how many items are still to come
+        try:
+            if use_batch(site, partials):
+                batch = detail_pool.submit(urls[0], fetch_details_batch, site, partials)
+            else:
+                futures = [
+                    (url_index, url, detail_pool.submit(url, fetch_details, site, url, partial))
+                    for url_index, (url, partial) in enumerate(zip(urls, partials))
+                ]
+        except RuntimeError:
+            return # pipeline already finished (search timed out)
+        events.put(PipelineEvent("urls", site, (site_index, -1), urls=urls))
+        if use_batch(site, partials):
+            batch.add_done_callback(lambda f: on_batch(site, site_index, urls, f))
+            return
+        for url_index, url, future in futures:
+            future.add_done_callback(
+                lambda f, s=site, p=(site_index, url_index), u=url: on_item(s, p, u, f)
+            )
+
+    for site_index, site in enumerate(sites):
+        search_pool.submit(run_search, site_index, site)
+
+    pending_sites = set(range(len(sites)))
+    timed_out = set()
+    pending_items = 0
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    detail_deadline = None
+    try:
+        while pending_sites or pending_items:
+            if not pending_sites and detail_deadline is None:
+                # searches are all in (or given up on): give the details a deadline too
+                detail_deadline = time.monotonic() + DETAIL_TIMEOUT
+            try:
+                # stop waiting on slow sites / items once their timeout has passed
+                remaining = (deadline if pending_sites else detail_deadline) - time.monotonic()
+                if remaining <= 0:
+                    raise queue.Empty
+                event = events.get(timeout=remaining)
+            except queue.Empty:
+                if not pending_sites:
+                    print(f"Details timed out for {pending_items} items")
+                    return
+                for site_index in sorted(pending_sites):
+                    print(f"Search timed out for site: {sites[site_index]}")
+                timed_out.update(pending_sites)
+                pending_sites.clear()
+                continue
+
+            site_index = event.position[0]
+            if site_index in timed_out:
+                continue # late result from a site we already gave up on
+            if event.kind == "urls":
+                pending_sites.discard(site_index)
+                pending_items += len(event.urls)
+            else:
+                pending_items -= 1
+            yield event
+    finally:
+        search_pool.shutdown(wait=False, cancel_futures=True)
+        detail_pool.shutdown(wait=False)
@@ -0,0 +1,86 @@
+from llm_client import call_llm
+from parse_input import parse_input
+from get_sites import PLATFORMS, choose_locally
+import json
+
+### combined planner
+# parse_input and get_sites each send the brief to the LLM with their own
+# prompt. plan_search asks for both in one call with a JSON reply, so the
+# brief is sent (and paid for) once. When the local site rules are already
+# sure (see get_sites.py) only the search phrase is asked for. The reply is
+# validated strictly; if it doesn't fit, the phrase is asked for on its own
+# and the local site choice is used.
+
+
+def validate_plan(raw_response):
+    """
+    {"parsed_input", "sites"} from a JSON planner reply.
+    Raises ValueError if the reply isn't exactly the expected shape.
+    """
+    start, end = raw_response.find("{"), raw_response.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("no JSON object in reply")
+    plan = json.loads(raw_response[start:end + 1])
+    if not isinstance(plan, dict):
+        raise ValueError("reply is not a JSON object")
+
+    query = plan.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("'query' must be a non-empty string")
+    query = "+".join(query.replace("+", " ").split())
+    if len(query) > 100:
+        raise ValueError("'query' is too long for a search phrase")
+
+    sites = plan.get("sites")
+    if not isinstance(sites, list) or not sites or not all(isinstance(s, str) for s in sites):
+        raise ValueError("'sites' must be a non-empty list of site codes")
+    unknown = [s for s in sites if s not in PLATFORMS]
+    if unknown:
+        raise ValueError(f"unknown site codes {unknown}")
+
+    return {"parsed_input": query, "sites": [code for code in PLATFORMS if code in sites]}
+
+
+def plan_search(user_input):
+    """{"parsed_input", "sites"} for the brief, in one LLM call."""
+    sites, settled = choose_locally(user_input)
+    if settled:
+        return {"parsed_input": parse_input(user_input), "sites": sites}
+
+    system_prompt = (
+        "Your task is to read a user's requirements for renting clothes and plan a search of fashion rental platforms.\n"
+        "1. Turn the requirements into a short search term for rental fashion sites.\n"
+        "Include only garment type plus key attributes (e.g. colour, style, vibe)\n"
+        "Do not include size, budget, date, or personal details.\n"
+        "2. Decide which of the listed possible fashion rental platforms are most suitable.\n"
+        "Be generous in your selection choice, only excluding platforms which are clearly not suitable.\n"
+        "Remember that renting clothes is cheaper than buying, so only exclude higher-price platforms for very low budgets.\n"
+        "Possible fashion rental platforms:\n"
+        + "".join(
+            f"CODE: \"{code}\", NAME: \"{name}\", DESCRIPTION: {description}\n"
+            for code, (name, description) in PLATFORMS.items()
+        )
+        + "Return ONLY a JSON object, with the platform CODES and not their names:\n"
+        "{\"query\": \"red+midi+dress\", \"sites\": [\"platform1\",\"platform2\"]}\n"
+    )
+
+    user_msg = (
+        f"User requirements:\n{user_input}"
+    )
+
+    raw_response = call_llm(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_msg},
+        ],
+        max_tokens=256,
+    )
+
+    print(raw_response)
+
+    try:
+        plan = validate_plan(raw_response)
+    except ValueError as e: # json.JSONDecodeError is a ValueError
+        print(f">>> Invalid planner reply ({e}), using the local site choice: {sites}")
+        return {"parsed_input": parse_input(user_input), "sites": sites}
+    return plan
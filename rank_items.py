@@ -1,4 +1,8 @@
-from typing import List, Dict
+import heapq
+import itertools
+import threading
+from typing import List, Dict, Optional, Sequence, Set
+
 
 def simple_similarity_score(user_query: str, description: str) -> float:
     """
@@ -22,6 +26,31 @@ def simple_similarity_score(user_query: str, description: str) -> float:
     return len(overlap) / len(q_words)
 
 
+def _query_words(user_query: str) -> Set[str]:
+    return set(user_query.lower().split())
+
+
+def _similarity(q_words: Set[str], description) -> float:
+    """simple_similarity_score with the query already split into words."""
+    if not description or not q_words:
+        return 0.0
+    try:
+        d_words = description.lower().split()
+    except:
+        return 0.0
+    # intersecting with the word list directly skips building a set per item
+    return len(q_words.intersection(d_words)) / len(q_words)
+
+
+def _delivery_score(delivery: Optional[str]) -> float:
+    delivery = (delivery or "").strip()
+    if "Next Day" in delivery:
+        return 2.0
+    if "2–3 Days" in delivery or "2-3 Days" in delivery:
+        return 1.0
+    return 0.0
+
+
 def score_item(user_query: str, item: Dict) -> Dict:
     """
     Compute total score for a single item:
@@ -30,6 +59,11 @@ def score_item(user_query: str, item: Dict) -> Dict:
     - similarity_score
     - total_score (sum of the above)
     """
+    return _score_item(_query_words(user_query), item)
+
+
+def _score_item(q_words: Set[str], item: Dict) -> Dict:
+    # score_item with the query already split into words
     score = 0.0
 
     # Price scoring 
@@ -45,20 +79,14 @@ def score_item(user_query: str, item: Dict) -> Dict:
     score += price_score
 
     # Delivery Time scoring
-    delivery = (item.get("delivery") or "").strip()
-    delivery_score = 0.0
-
-    if "Next Day" in delivery:
-        delivery_score = 2.0
-    elif "2–3 Days" in delivery or "2-3 Days" in delivery:
-        delivery_score = 1.0
+    delivery_score = _delivery_score(item.get("delivery"))
 
     score += delivery_score
 
     # Description similarity scoring
     # Use description if present, else fall back to title, else empty string
     desc = item.get("description") or item.get("title") or ""
-    sim = simple_similarity_score(user_query, desc)  # 0 to 1
+    sim = _similarity(q_words, desc)  # 0 to 1
 
     similarity_score = sim * 2.0 
     score += similarity_score
@@ -72,17 +100,110 @@ def score_item(user_query: str, item: Dict) -> Dict:
     return item
 
 
-def rank_items(user_query: str, items: List[Dict]) -> List[Dict]:
+### batch scoring
+# score_items scores a whole candidate list with the query split into words
+# once (score_item splits it again for every item). The score fields are
+# exactly the ones score_item sets.
+
+def score_items(user_query: str, items: Sequence[Dict]) -> List[float]:
+    """
+    Score all items in one pass, setting the same fields as score_item
+    on each. Returns the total scores in item order.
+    """
+    q_words = _query_words(user_query)
+    return [_score_item(q_words, item)["total_score"] for item in items]
+
+
+def top_k_indices(totals: Sequence[float], k: Optional[int] = None) -> List[int]:
+    """
+    Indices of the k highest totals, best first; ties keep input order
+    (the same as a stable descending sort cut to k). k=None: all.
+    """
+    n = len(totals)
+    if k is None or k >= n:
+        return sorted(range(n), key=lambda i: totals[i], reverse=True)
+    # partial selection: O(n log k) instead of sorting everything
+    return heapq.nsmallest(max(0, k), range(n), key=lambda i: (-totals[i], i))
+
+
+def sort_scored_items(items: List[Dict], top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Return already-scored items sorted by total_score (descending), cut to
+    top_k if given. Ties keep their input order.
+    """
+    totals = [item.get("total_score", 0.0) for item in items]
+    return [items[i] for i in top_k_indices(totals, top_k)]
+
+
+def rank_items(user_query: str, items: List[Dict], top_k: Optional[int] = None) -> List[Dict]:
     """
     Rank a list of items by their total_score (descending).
-    Adds scoring fields to each item.
+    Adds scoring fields to each item. top_k: only return the best top_k.
     """
-    scored_items: List[Dict] = []
+    totals = score_items(user_query, items)
+    return [items[i] for i in top_k_indices(totals, top_k)]
+
+
+### incremental ranking
+class _Later:
+    """Wraps an order key so that later (larger) keys compare as smaller."""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
 
-    for item in items:
-        scored = score_item(user_query, item)
-        scored_items.append(scored)
+    def __lt__(self, other: "_Later") -> bool:
+        return other.key < self.key
 
-    scored_items.sort(key=lambda x: x.get("total_score", 0.0), reverse=True)
+    def __eq__(self, other) -> bool:
+        return self.key == other.key
+
+
+class TopKRanker:
+    """
+    Ranks items one at a time as they are scraped, keeping only the best k
+    in a bounded min-heap (the current k-th best at the root), so adding an
+    item is O(log k) and a provisional ranking is available at any moment.
+
+    Ties are broken by `order` (default: arrival order), earliest first,
+    which gives the same result as rank_items on the items in that order.
+
+    Usage:
+        ranker = TopKRanker(user_query, k=10)
+        for item in items_as_they_arrive:
+            ranker.add(item)
+            show(ranker.ranking())
+    """
 
-    return scored_items
+    def __init__(self, user_query: str, k: int = 10):
+        self.k = max(1, k)
+        self._q_words = _query_words(user_query)
+        self._heap: List[tuple] = []
+        self._arrivals = itertools.count()
+        self._lock = threading.Lock()
+        self.seen = 0
+
+    def add(self, item: Dict, order=None) -> Dict:
+        """Score item (setting the same fields as score_item) and offer it to the top k."""
+        _score_item(self._q_words, item)
+        arrival = next(self._arrivals)
+        order = arrival if order is None else order
+        # heap root = worst kept item: lowest score, then latest order
+        entry = (item["total_score"], _Later(order), arrival, item)
+        with self._lock:
+            self.seen += 1
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif self._heap[0][:2] < entry[:2]:
+                heapq.heapreplace(self._heap, entry)
+        return item
+
+    def ranking(self) -> List[Dict]:
+        """Current top k, best first."""
+        with self._lock:
+            entries = list(self._heap)
+        entries.sort(key=lambda e: e[:2], reverse=True)
+        return [entry[3] for entry in entries]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,111 @@
+# recommend.py
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from graph import graph, TOP_K
+from agent_ranking import agent_rank_with_llm, trace_level
+from cache import make_key
+from item import as_dict
+from singleflight import SingleFlight
+
+# identical briefs submitted while one is already being worked on share its
+# events and result instead of running the scrapes and LLM calls again
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+_flights = SingleFlight()
+
+# (event name, data) pairs yielded by recommend_events, in this order:
+# - "step":         a workflow step finished             {"step"}
+# - "parsed_query": the brief turned into a search query {"parsed_input"}
+# - "sites":        the rental sites chosen              {"sites"}
+# - "site_items":   one site's scraped items             {"site", "items"}
+# - "provisional":  rule-based top TOP_K, before the LLM {"ranked_items"}
+#                   (also sent after each site in PIPELINE_MODE, as items arrive)
+# - "result":       the final payload (same as /api/recommend)
+# "step", "site_items", the two state events and the early "provisional"
+# rankings interleave as steps finish.
+Event = Tuple[str, Dict[str, Any]]
+
+
+def recommend_events(user_input: str, trace: Optional[str] = None) -> Iterator[Event]:
+    """
+    Run the LangGraph workflow and the LLM re-rank for one brief, yielding
+    progress events. trace: agent trace level (default TRACE_LEVEL).
+    """
+    trace = trace_level(trace)
+    print(">>> Received from frontend:\n", user_input)
+    print(">>> Calling graph.stream(...)")
+
+    # LangGraph workflow, step by step so progress can be reported
+    final_state: Dict[str, Any] = {"user_input": user_input}
+    for mode, chunk in graph.stream({"user_input": user_input}, stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            data = as_dict(dict(chunk))
+            yield data.pop("event"), data
+            continue
+        for step, values in chunk.items():
+            values = values or {}
+            final_state.update(values)
+            yield "step", {"step": step}
+            if "parsed_input" in values:
+                yield "parsed_query", {"parsed_input": values["parsed_input"]}
+            if "sites" in values:
+                yield "sites", {"sites": list(values["sites"])}
+
+    print(">>> Full final_state:", final_state, type(final_state))
+
+    #Take items from graph output (ranked_items: already scored, best TOP_K first)
+    items: List[Dict[str, Any]] = final_state.get("items") or []
+    ranked: List[Dict[str, Any]] = final_state.get("ranked_items") or []
+
+    if not ranked:
+        yield "result", {
+            "ranked_items": [],
+            "llm_choice": None,
+            "llm_explanation": "No items found.",
+            "trace": [],
+        }
+        return
+
+    yield "provisional", {"ranked_items": as_dict(ranked[:TOP_K])}
+
+    # Run explainable ranking agent
+    yield "step", {"step": "llm_ranking_step"}
+    agent_result = agent_rank_with_llm(user_input, items, trace, ranked=ranked)
+
+    # Items become plain dicts on the way out
+    yield "result", as_dict({
+        "ranked_items": agent_result["ranked_items"][:TOP_K],
+        "llm_choice": agent_result["llm_choice"],
+        "llm_explanation": agent_result["llm_explanation"],
+        "trace": agent_result["trace"],
+    })
+
+
+def brief_key(user_input: str, trace: Optional[str] = None) -> str:
+    """Key for coalescing: the brief with case and whitespace normalised, and the trace level."""
+    return make_key(" ".join((user_input or "").split()).lower(), trace_level(trace))
+
+
+def shared_recommend_events(user_input: str, trace: Optional[str] = None) -> Iterator[Event]:
+    """
+    recommend_events, attached to the computation already running for an
+    identical brief if there is one (the events are replayed from the start).
+    """
+    if not COALESCE_REQUESTS:
+        return recommend_events(user_input, trace)
+    return _flights.stream(brief_key(user_input, trace), lambda: recommend_events(user_input, trace))
+
+
+def coalescing_stats() -> Dict[str, int]:
+    return _flights.stats()
+
+
+def recommend(user_input: str, trace: Optional[str] = None) -> Dict[str, Any]:
+    """Run the whole recommendation for one brief and return the payload sent to the frontend."""
+    result: Dict[str, Any] = {}
+    for event, data in shared_recommend_events(user_input, trace):
+        if event == "result":
+            result = data
+    return result
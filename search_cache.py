@@ -0,0 +1,96 @@
+# search_cache.py
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from cache import TTLCache
+
+# Site search results keyed by (site, normalised query, max_per_site).
+# Fresh entries are served directly; stale ones are served immediately while
+# a background refresh fetches new results (stale-while-revalidate).
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE", "true").lower() == "true"
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1000"))
+# seconds results are fresh, and how long past that they may still be served
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_STALE = float(os.getenv("SEARCH_CACHE_STALE", "86400"))
+
+_cache = TTLCache(max_entries=SEARCH_CACHE_SIZE)
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+_refreshing = set()
+_lock = threading.Lock()
+stale_hits = 0
+refreshes = 0
+
+
+def normalise_query(query: str) -> str:
+    """'Black  Midi+dress ' -> 'black+midi+dress'"""
+    return "+".join(word for word in re.split(r"[\s+]+", (query or "").lower()) if word)
+
+
+def _copy(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # callers add fields to the items they get back
+    return [dict(item) for item in items]
+
+
+def _search(key: str, search: Callable, query: str, max_per_site: int) -> Tuple[List[Dict[str, Any]], float]:
+    fetched_at = time.time()
+    items = search(query, max_per_site)
+    # empty results are often a swallowed API error, so don't keep them
+    if items:
+        _cache.set(key, {"items": _copy(items), "fetched_at": fetched_at})
+    return items, fetched_at
+
+
+def _refresh(key: str, site: str, search: Callable, query: str, max_per_site: int) -> None:
+    global refreshes
+    try:
+        _search(key, search, query, max_per_site)
+        refreshes += 1
+    except Exception as e:
+        print(f"Background search refresh failed for site {site}: {e!r}")
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+
+def get_items(site: str, search: Callable, query: str, max_per_site: int) -> List[Dict[str, Any]]:
+    """
+    search(query, max_per_site) for site, served from the cache when
+    possible. Errors from a live search propagate to the caller.
+    """
+    return get_items_fetched_at(site, search, query, max_per_site)[0]
+
+
+def get_items_fetched_at(site: str, search: Callable, query: str, max_per_site: int) -> Tuple[List[Dict[str, Any]], float]:
+    """get_items, plus when the results were fetched (older than now for cached or stale ones)."""
+    if not SEARCH_CACHE_ENABLED:
+        return search(query, max_per_site), time.time()
+
+    global stale_hits
+    key = f"{site}|{normalise_query(query)}|{max_per_site}"
+    entry = _cache.get(key)
+    if entry is not None:
+        age = time.time() - entry["fetched_at"]
+        if age <= SEARCH_CACHE_TTL:
+            return _copy(entry["items"]), entry["fetched_at"]
+        if age <= SEARCH_CACHE_TTL + SEARCH_CACHE_STALE:
+            stale_hits += 1
+            with _lock:
+                start_refresh = key not in _refreshing
+                _refreshing.add(key)
+            if start_refresh:
+                _refresh_pool.submit(_refresh, key, site, search, query, max_per_site)
+            return _copy(entry["items"]), entry["fetched_at"]
+
+    return _search(key, search, query, max_per_site)
+
+
+def cache_stats() -> Dict[str, Any]:
+    stats = _cache.stats()
+    stats["stale_hits"] = stale_hits
+    stats["background_refreshes"] = refreshes
+    return stats
@@ -0,0 +1,106 @@
+# singleflight.py
+
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class Flight:
+    """
+    One in-flight computation: the events it has produced so far, replayable
+    from the start by every caller attached to it.
+    """
+
+    def __init__(self):
+        self._events: List[Any] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self.followers = 0
+
+    def publish(self, event: Any) -> None:
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    def follow(self) -> Iterator[Any]:
+        """Yield every event (past and future) in order; re-raise the producer's error at the end."""
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: index < len(self._events) or self._done)
+                new = self._events[index:]
+                done, error = self._done, self._error
+            for event in new:
+                yield event
+            index += len(new)
+            if done and index == len(self._events):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent computations: while one is running for a
+    key, later callers with the same key attach to it and see the same
+    events instead of starting their own.
+
+    The producer runs on its own thread, so a caller that goes away (e.g. a
+    closed connection) doesn't cut the others short. Finished flights are
+    forgotten straight away; this is not a cache.
+
+    Usage:
+        flights = SingleFlight()
+        for event in flights.stream(key, lambda: produce_events(...)):
+            ...
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.coalesced = 0
+
+    def stream(self, key: str, produce: Callable[[], Iterable[Any]]) -> Iterator[Any]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = Flight()
+                self._flights[key] = flight
+                self.started += 1
+                leader = True
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+                leader = False
+
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, produce), daemon=True).start()
+        return flight.follow()
+
+    def _run(self, key: str, flight: Flight, produce: Callable[[], Iterable[Any]]) -> None:
+        error = None
+        try:
+            for event in produce():
+                flight.publish(event)
+        except BaseException as e:
+            error = e
+        finally:
+            # new callers start a fresh flight from here on
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(error)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
@@ -1,4 +1,4 @@
-import requests
+from sites import transport, br_2
 from typing import List, Dict
 import json
 
@@ -31,8 +31,22 @@ def extract_hits(data):
             .get("hits", [])
     )
 
-def get_item_urls(query: str, max_per_site: int) -> List[Dict]:
-    """Fetch a single page of ByRotation products matching query."""
+def hit_to_item(hit: Dict) -> Dict:
+    """
+    Partial item from a search hit, mapped the same way as the listing JSON
+    embedded in product pages. Fields the hit doesn't have are left out, so
+    get_details fills them in.
+    """
+    url = f"{BASE_DOMAIN}/products/{hit.get('slug')}"
+    item = br_2.listing_to_item(url, hit)
+    partial = {key: value for key, value in item.items() if value not in (None, "", [])}
+    for key in ("title", "brand"):
+        if isinstance(partial.get(key), str):
+            partial[key] = partial[key].strip()
+    return partial
+
+def get_items(query: str, max_per_site: int) -> List[Dict]:
+    """Fetch a single page of ByRotation products matching query, as partial items."""
     input_param = {
         "0": {
             "json": {
@@ -47,13 +61,17 @@ def get_item_urls(query: str, max_per_site: int) -> List[Dict]:
         "batch": 1,
         "input": json.dumps(input_param)
     }
-    resp = requests.get(API_ENDPOINT, headers=HEADERS, params=params, timeout=20)
+    resp = transport.get(API_ENDPOINT, headers=HEADERS, params=params, timeout=20)
     resp.raise_for_status()
     hits = extract_hits(resp.json())
 
-    urls = []
+    items = []
     for hit in hits:
         if hit.get("status") != "ACTIVE":
             continue
-        urls.append(f"{BASE_DOMAIN}/products/{hit.get('slug')}")
-    return urls
\ No newline at end of file
+        items.append(hit_to_item(hit))
+    return items
+
+def get_item_urls(query: str, max_per_site: int) -> List[str]:
+    """Fetch a single page of ByRotation product urls matching query."""
+    return [item["url"] for item in get_items(query, max_per_site)]
@@ -1,13 +1,25 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from sites import transport
+from item import _number
+from sites.html_parse import make_soup
+from typing import List, Dict, Optional
 import json
+import os
 import time
 import re
 
 API_ENDPOINT = "https://api.byrotation.com/trpc/listing.list"
 BASE_DOMAIN = "https://byrotation.com"
 PAGE_SIZE = 36
+# look listings up through the tRPC endpoint when the page leaves key fields
+# empty. Off by default: it costs a second request for most pages and the
+# listing keys it reads are not yet confirmed (see listing_to_item)
+STRUCTURED_API_FALLBACK = os.getenv("BR_API_FALLBACK", "false").lower() == "true"
+
+# fields get_details returns (search hits that already have all of them skip the page fetch)
+DETAIL_FIELDS = (
+    "platform", "url", "title", "brand", "description", "size", "color", "location", "owner",
+    "retail_price", "rental_3days", "rental_7days", "rental_28days", "images",
+)
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -51,149 +63,328 @@ def fetch_products(query: str, skip: int = 0) -> List[Dict]:
         "batch": 1,
         "input": json.dumps(input_param)
     }
-    resp = requests.get(API_ENDPOINT, headers=HEADERS, params=params, timeout=20)
+    resp = transport.get(API_ENDPOINT, headers=HEADERS, params=params, timeout=20)
     resp.raise_for_status()
     data = resp.json()
     hits = extract_hits(data)
     return hits
 
+def fetch_page(url: str, validators: Optional[Dict] = None):
+    """Fetch a product page (as a conditional GET if ETag/Last-Modified validators are given)."""
+    headers = {**HEADERS, **transport.conditional_headers(validators)}
+    return transport.get(url, headers=headers, timeout=10)
+
+def parse_page_text(url: str, html: str) -> Dict:
+    """Regex fallback: extract details from the flattened text of a product page."""
+    # only scripts with image urls are read below
+    soup = make_soup(html, keep_scripts=("image",))
+
+    # Get all text content
+    page_text = soup.get_text()
+    
+    # Extract title - look for the dress name pattern
+    title = None
+    title_match = re.search(r'REISS\s+([A-Z\s,]+?)(?:The|brand)', page_text)
+    if title_match:
+        title = title_match.group(1).strip().rstrip(',')
+    
+    # Extract brand - just the brand name
+    brand = None
+    brand_match = re.search(r'brand(Reiss)', page_text, re.IGNORECASE)
+    if brand_match:
+        brand = brand_match.group(1)
+    else:
+        # Try from the dress name
+        if 'REISS' in page_text:
+            brand = "Reiss"
+    
+    # Extract size
+    size = None
+    size_match = re.search(r'sizeUK\s+(\d+)', page_text)
+    if size_match:
+        size = f"UK {size_match.group(1)}"
+    
+    # Extract location
+    location = None
+    location_match = re.search(r'location([^c]+?)colour', page_text)
+    if location_match:
+        location = location_match.group(1).strip()
+    
+    # Extract color
+    color = None
+    color_match = re.search(r'colourRed', page_text) or re.search(r'colour([A-Za-z]+)', page_text)
+    if color_match:
+        if 'Red' in color_match.group(0):
+            color = "Red"
+        else:
+            color = color_match.group(1)
+    
+    # Extract retail price (RRP)
+    retail_price = None
+    rrp_match = re.search(r'RRP\s*£(\d+)', page_text)
+    if rrp_match:
+        retail_price = int(rrp_match.group(1))
+    
+    # Extract rental prices
+    rental_3days = None
+    rental_7days = None
+    rental_28days = None
+    
+    # 3+ days price
+    match_3 = re.search(r'3\+\s*days£([\d.]+)/day', page_text)
+    if match_3:
+        rental_3days = float(match_3.group(1))
+    
+    # 7+ days price
+    match_7 = re.search(r'7\+\s*days£([\d.]+)/day', page_text)
+    if match_7:
+        rental_7days = float(match_7.group(1))
+    
+    # 28+ days price
+    match_28 = re.search(r'28\+\s*days£([\d.]+)/day', page_text)
+    if match_28:
+        rental_28days = float(match_28.group(1))
+    
+    # Extract description
+    description = None
+    desc_match = re.search(r'DARK RED(.*?)brand', page_text, re.DOTALL)
+    if desc_match:
+        description = desc_match.group(1).strip()
+    
+    # Extract owner username
+    owner = None
+    owner_match = re.search(r'UK\s+\d+([a-z]+)Aberdeen', page_text)
+    if owner_match:
+        owner = owner_match.group(1)
+    
+    # Extract images from img tags (even if they're lazy loaded)
+    images = []
+    
+    # Method 1: Look for img tags with src or data-src
+    img_tags = soup.find_all('img')
+    for img in img_tags:
+        src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+        if src and src not in images:
+            # Filter out icons, logos, etc
+            if any(word in src.lower() for word in ['product', 'item', 'listing', 'upload', 'cloudinary']):
+                if src.startswith('//'):
+                    src = 'https:' + src
+                elif src.startswith('/'):
+                    src = BASE_DOMAIN + src
+                images.append(src)
+    
+    # Method 2: Look for Next.js image data in script tags
+    scripts = soup.find_all('script')
+    for script in scripts:
+        if script.string and 'image' in script.string.lower():
+            # Look for image URLs in JSON
+            img_urls = re.findall(r'https?://[^"\'>\s]+\.(?:jpg|jpeg|png|webp)', script.string)
+            for img_url in img_urls:
+                if img_url not in images and 'product' in img_url.lower():
+                    images.append(img_url)
+    
+    # Method 3: Look in meta tags
+    og_image = soup.find('meta', property='og:image')
+    if og_image:
+        img_url = og_image.get('content')
+        if img_url and img_url not in images:
+            images.append(img_url)
+    
+    return {
+        "platform": "ByRotation",
+        "url": url,
+        "title": title or "N/A",
+        "brand": brand or "N/A",
+        "description": description or "",
+        "size": size,
+        "color": color,
+        "location": location,
+        "owner": owner,
+        "retail_price": retail_price,
+        "rental_3days": rental_3days,
+        "rental_7days": rental_7days,
+        "rental_28days": rental_28days,
+        "images": images
+    }
+
+### structured extraction
+# ByRotation is a Next.js site, so the listing is embedded in the page as JSON
+# (__NEXT_DATA__ for the pages router, self.__next_f.push(...) chunks for the
+# app router). Decoding that is faster than regex-scanning the page text.
+# get_details falls back to the tRPC listing endpoint (complete_details) when
+# the page leaves key fields empty; parse_details itself never makes requests.
+
+NEXT_DATA_RE = re.compile(r'<script[^>]+id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+NEXT_F_RE = re.compile(r'self\.__next_f\.push\(\[\d+,\s*("(?:[^"\\]|\\.)*")\]\)', re.DOTALL)
+# fields worth a regex fallback if the structured data leaves them empty
+REQUIRED_FIELDS = ("title", "brand", "rental_3days")
+
+def extract_slug(url: str) -> str:
+    return url.split("/products/")[-1].split("?")[0].split("#")[0].strip("/")
+
+def _json_values(text: str):
+    """Yield every JSON object/array that can be decoded from text."""
+    decoder = json.JSONDecoder()
+    index = 0
+    while True:
+        starts = [i for i in (text.find("{", index), text.find("[", index)) if i != -1]
+        if not starts:
+            return
+        start = min(starts)
+        try:
+            value, end = decoder.raw_decode(text, start)
+        except ValueError:
+            index = start + 1
+            continue
+        yield value
+        index = end
+
+def _find_listing(data, slug: str, depth: int = 0) -> Optional[Dict]:
+    """Depth-first search for the dict describing this listing (matched by slug)."""
+    if depth > 40:
+        return None
+    if isinstance(data, dict):
+        if data.get("slug") == slug and any(k in data for k in ("title", "name", "brand")):
+            return data
+        values = data.values()
+    elif isinstance(data, list):
+        values = data
+    else:
+        return None
+    for value in values:
+        found = _find_listing(value, slug, depth + 1)
+        if found is not None:
+            return found
+    return None
+
+def extract_embedded_listing(html: str, slug: str) -> Optional[Dict]:
+    """Find the listing JSON Next.js embeds in a product page."""
+    match = NEXT_DATA_RE.search(html)
+    if match:
+        try:
+            listing = _find_listing(json.loads(match.group(1)), slug)
+            if listing is not None:
+                return listing
+        except ValueError:
+            pass
+
+    # app router: the RSC payload arrives as JSON-encoded string chunks
+    if not slug or slug not in html:
+        return None
+    chunks = []
+    for chunk in NEXT_F_RE.findall(html):
+        try:
+            chunks.append(json.loads(chunk))
+        except ValueError:
+            continue
+    for value in _json_values("".join(chunks)):
+        listing = _find_listing(value, slug)
+        if listing is not None:
+            return listing
+    return None
+
+def fetch_listing(slug: str) -> Optional[Dict]:
+    """Look the listing up through the tRPC listing endpoint."""
+    for hit in fetch_products(slug.replace("-", " ")):
+        if hit.get("slug") == slug:
+            return hit
+    return None
+
+def _name(value):
+    """Nested objects (brand, location) carry their label under "name"."""
+    return value.get("name") if isinstance(value, dict) else value
+
+def _missing(value) -> bool:
+    return value in (None, "", [], "N/A")
+
+# Listing keys read below. Only "slug" and "status" are confirmed by the
+# search code; the rest are unverified until checked against a saved
+# product page (benchmarks/br_structured.py compares field coverage with
+# the regex scan). Fields they don't fill are taken from the regex scan.
+def listing_to_item(url: str, listing: Dict) -> Dict:
+    """Map a listing object (embedded JSON or tRPC hit) to our item dict."""
+    rates = {}
+    for tier in listing.get("rentalPrices") or []:
+        if isinstance(tier, dict):
+            days, price = _number(tier.get("days")), _number(tier.get("pricePerDay"))
+            if days and price is not None:
+                rates[int(days)] = price
+
+    images = []
+    for image in listing.get("images") or []:
+        src = image.get("url") if isinstance(image, dict) else image
+        if isinstance(src, str) and src and src not in images:
+            images.append(src)
+
+    size = listing.get("size")
+    retail_price = _number(listing.get("rrp"))
+    owner = listing.get("user")
+    owner = owner.get("username") if isinstance(owner, dict) else None
+
+    return {
+        "platform": "ByRotation",
+        "url": url,
+        "title": listing.get("title"),
+        "brand": _name(listing.get("brand")),
+        "description": listing.get("description"),
+        "size": str(size) if size is not None else None,
+        "color": listing.get("colour"),
+        "location": _name(listing.get("location")),
+        "owner": owner,
+        "retail_price": int(retail_price) if retail_price is not None else None,
+        "rental_3days": rates.get(3),
+        "rental_7days": rates.get(7),
+        "rental_28days": rates.get(28),
+        "images": images,
+    }
+
+def _fill_missing(item: Dict, other: Dict) -> Dict:
+    for key, value in other.items():
+        if _missing(item.get(key)) and not _missing(value):
+            item[key] = value
+    return item
+
+def parse_details(url: str, html: str) -> Dict:
+    """
+    Extract all details from a ByRotation product page: from the embedded
+    listing JSON, with the regex scan of the page text as the fallback (and
+    to fill any key fields the JSON leaves empty). No network calls.
+    """
+    listing = extract_embedded_listing(html, extract_slug(url))
+    if listing is None:
+        return parse_page_text(url, html)
+
+    item = listing_to_item(url, listing)
+    if any(_missing(item.get(field)) for field in REQUIRED_FIELDS):
+        _fill_missing(item, parse_page_text(url, html))
+    item["title"] = item["title"] or "N/A"
+    item["brand"] = item["brand"] or "N/A"
+    item["description"] = item["description"] or ""
+    return item
+
+def complete_details(url: str, item: Dict) -> Dict:
+    """
+    Fill key fields the page didn't give us from the tRPC listing endpoint
+    (one extra request, only when one of REQUIRED_FIELDS is still empty).
+    """
+    if not STRUCTURED_API_FALLBACK or not any(_missing(item.get(f)) for f in REQUIRED_FIELDS):
+        return item
+    try:
+        listing = fetch_listing(extract_slug(url))
+    except Exception as e:
+        print(f"  ✗ Listing lookup failed: {e}")
+        return item
+    if listing is None:
+        return item
+    return _fill_missing(item, listing_to_item(url, listing))
+
 def get_details(url: str) -> Dict:
     """Scrape all details from a ByRotation product page."""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetch_page(url)
         response.raise_for_status()
-        
-        html = response.text
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Get all text content
-        page_text = soup.get_text()
-        
-        # Extract title - look for the dress name pattern
-        title = None
-        title_match = re.search(r'REISS\s+([A-Z\s,]+?)(?:The|brand)', page_text)
-        if title_match:
-            title = title_match.group(1).strip().rstrip(',')
-        
-        # Extract brand - just the brand name
-        brand = None
-        brand_match = re.search(r'brand(Reiss)', page_text, re.IGNORECASE)
-        if brand_match:
-            brand = brand_match.group(1)
-        else:
-            # Try from the dress name
-            if 'REISS' in page_text:
-                brand = "Reiss"
-        
-        # Extract size
-        size = None
-        size_match = re.search(r'sizeUK\s+(\d+)', page_text)
-        if size_match:
-            size = f"UK {size_match.group(1)}"
-        
-        # Extract location
-        location = None
-        location_match = re.search(r'location([^c]+?)colour', page_text)
-        if location_match:
-            location = location_match.group(1).strip()
-        
-        # Extract color
-        color = None
-        color_match = re.search(r'colourRed', page_text) or re.search(r'colour([A-Za-z]+)', page_text)
-        if color_match:
-            if 'Red' in color_match.group(0):
-                color = "Red"
-            else:
-                color = color_match.group(1)
-        
-        # Extract retail price (RRP)
-        retail_price = None
-        rrp_match = re.search(r'RRP\s*£(\d+)', page_text)
-        if rrp_match:
-            retail_price = int(rrp_match.group(1))
-        
-        # Extract rental prices
-        rental_3days = None
-        rental_7days = None
-        rental_28days = None
-        
-        # 3+ days price
-        match_3 = re.search(r'3\+\s*days£([\d.]+)/day', page_text)
-        if match_3:
-            rental_3days = float(match_3.group(1))
-        
-        # 7+ days price
-        match_7 = re.search(r'7\+\s*days£([\d.]+)/day', page_text)
-        if match_7:
-            rental_7days = float(match_7.group(1))
-        
-        # 28+ days price
-        match_28 = re.search(r'28\+\s*days£([\d.]+)/day', page_text)
-        if match_28:
-            rental_28days = float(match_28.group(1))
-        
-        # Extract description
-        description = None
-        desc_match = re.search(r'DARK RED(.*?)brand', page_text, re.DOTALL)
-        if desc_match:
-            description = desc_match.group(1).strip()
-        
-        # Extract owner username
-        owner = None
-        owner_match = re.search(r'UK\s+\d+([a-z]+)Aberdeen', page_text)
-        if owner_match:
-            owner = owner_match.group(1)
-        
-        # Extract images from img tags (even if they're lazy loaded)
-        images = []
-        
-        # Method 1: Look for img tags with src or data-src
-        img_tags = soup.find_all('img')
-        for img in img_tags:
-            src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-            if src and src not in images:
-                # Filter out icons, logos, etc
-                if any(word in src.lower() for word in ['product', 'item', 'listing', 'upload', 'cloudinary']):
-                    if src.startswith('//'):
-                        src = 'https:' + src
-                    elif src.startswith('/'):
-                        src = BASE_DOMAIN + src
-                    images.append(src)
-        
-        # Method 2: Look for Next.js image data in script tags
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string and 'image' in script.string.lower():
-                # Look for image URLs in JSON
-                img_urls = re.findall(r'https?://[^"\'>\s]+\.(?:jpg|jpeg|png|webp)', script.string)
-                for img_url in img_urls:
-                    if img_url not in images and 'product' in img_url.lower():
-                        images.append(img_url)
-        
-        # Method 3: Look in meta tags
-        og_image = soup.find('meta', property='og:image')
-        if og_image:
-            img_url = og_image.get('content')
-            if img_url and img_url not in images:
-                images.append(img_url)
-        
-        return {
-            "platform": "ByRotation",
-            "url": url,
-            "title": title or "N/A",
-            "brand": brand or "N/A",
-            "description": description or "",
-            "size": size,
-            "color": color,
-            "location": location,
-            "owner": owner,
-            "retail_price": retail_price,
-            "rental_3days": rental_3days,
-            "rental_7days": rental_7days,
-            "rental_28days": rental_28days,
-            "images": images
-        }
-    
+        return complete_details(url, parse_details(url, response.text))
+
     except Exception as e:
         print(f"  ✗ Error: {e}")
         import traceback
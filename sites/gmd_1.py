@@ -1,6 +1,6 @@
 import re
 from typing import List, Dict, Optional
-import requests
+from sites import transport
 from bs4 import BeautifulSoup
 
 ### parse html and extract item urls
@@ -50,6 +50,6 @@ def get_item_urls(user_input, max_per_site) -> List[Dict]:
     }
 
     # fetch page and parse urls
-    resp = requests.get(COLLECTION_URL, headers=HEADERS, timeout=15)
+    resp = transport.get(COLLECTION_URL, headers=HEADERS, timeout=15)
     resp.raise_for_status()
     return extract_urls_from_html(resp.text, BASE_DOMAIN, max_per_site)
\ No newline at end of file
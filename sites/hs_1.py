@@ -1,4 +1,5 @@
-import requests
+from sites import transport
+from sites.hs_2 import build_product
 import json
 
 ENDPOINT = "https://www.hirestreetuk.com/api/2025-01/graphql.json"
@@ -10,6 +11,9 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
+# the Storefront API has no timeout of its own in the calls below
+transport.configure_host(ENDPOINT, timeout=15)
+
 GRAPHQL_QUERY = """
 query getSearchResults($query: String!, $productFilters: [ProductFilter!], $productLimitFirst: Int, $afterCursor: String) {
   search(
@@ -33,11 +37,15 @@ query getSearchResults($query: String!, $productFilters: [ProductFilter!], $prod
           handle
           vendor
           id
+          description
           images(first: 2) {
             nodes { url }
           }
           priceRange {
-            minVariantPrice { amount }
+            minVariantPrice { amount currencyCode }
+          }
+          compareAtPriceRange {
+            minVariantPrice { amount currencyCode }
           }
           variants(first: 250) {
             edges {
@@ -76,7 +84,7 @@ def fetch_urls(search_term, max_per_site, cursor=None):
         ]
     }
 
-    response = requests.post(
+    response = transport.post(
         ENDPOINT,
         headers=HEADERS,
         json={"query": GRAPHQL_QUERY, "variables": variables}
@@ -88,11 +96,14 @@ def fetch_urls(search_term, max_per_site, cursor=None):
     return data["data"]["search"]
 
 
-def get_item_urls(search_term, max_per_site):
-    item_urls = []
-    cursor = None
+def get_items(search_term, max_per_site):
+    """
+    Search Hirestreet and build items straight from the search nodes, which
+    carry every field get_details reads (only with fewer images).
+    """
+    items = []
 
-    result = fetch_urls(search_term, max_per_site, cursor)
+    result = fetch_urls(search_term, max_per_site)
 
     edges = result["edges"]
 
@@ -104,10 +115,12 @@ def get_item_urls(search_term, max_per_site):
         node = edge["node"]
 
         # Build the public product URL
-        node["url"] = f"https://www.hirestreetuk.com/products/{node['handle']}"
+        url = f"https://www.hirestreetuk.com/products/{node['handle']}"
 
-        item_urls.append(node["url"])
+        items.append(build_product(url, node))
 
-    cursor = result["pageInfo"]["endCursor"]
+    return items
 
-    return item_urls
+
+def get_item_urls(search_term, max_per_site):
+    return [item["url"] for item in get_items(search_term, max_per_site)]
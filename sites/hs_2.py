@@ -1,4 +1,4 @@
-import requests
+from sites import transport
 import json
 
 API_URL = "https://www.hirestreetuk.com/api/2025-01/graphql.json"
@@ -9,40 +9,90 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
+# Fields we read from each product, shared by the single and batched queries
+PRODUCT_FIELDS = """
+fragment ProductDetails on Product {
+  title
+  vendor
+  description
+  images(first: 20) { nodes { url } }
+  productType
+  priceRange {
+    minVariantPrice { amount currencyCode }
+  }
+  compareAtPriceRange {
+    minVariantPrice { amount currencyCode }
+  }
+  variants(first: 250) {
+    edges {
+      node {
+        selectedOptions { name value }
+        price { amount currencyCode }
+      }
+    }
+  }
+}
+"""
+
+# products fetched per batched GraphQL document
+BATCH_SIZE = 25
+TIMEOUT = 15
+
+# fields get_details returns (search hits that already have all of them skip the detail fetch)
+DETAIL_FIELDS = (
+    "url", "title", "brand", "description", "rental_prices", "daily_rate", "retail_price",
+    "sizes", "images",
+)
+
+def extract_handle(url):
+    return url.split("/products/")[-1].split("?")[0]
+
+def build_product(url, product):
+    """Turn a Storefront product node into our item dict."""
+    # Extract sizes (from variant option "Size")
+    sizes = []
+    for edge in product["variants"]["edges"]:
+        opts = edge["node"]["selectedOptions"]
+        for o in opts:
+            if o["name"].lower() == "size":
+                sizes.append(o["value"])
+
+    return {
+        "url": url,
+        "title": product["title"],
+        "brand": product["vendor"],
+        "description": product["description"],
+        "rental_prices": {
+            "amount": float(product["priceRange"]["minVariantPrice"]["amount"]),
+            "currency": product["priceRange"]["minVariantPrice"]["currencyCode"]
+        },
+        "daily_rate": None,  # API does not expose daily rate
+        "retail_price": (
+            {
+                "amount": float(product["compareAtPriceRange"]["minVariantPrice"]["amount"]),
+                "currency": product["compareAtPriceRange"]["minVariantPrice"]["currencyCode"]
+            }
+            if product.get("compareAtPriceRange") and product["compareAtPriceRange"]["minVariantPrice"]
+            else None
+        ),
+        "sizes": sorted(list(set(sizes))),
+        "images": [img["url"] for img in product["images"]["nodes"]],
+    }
+
 def get_details(url):
     # Extract handle
-    handle = url.split("/products/")[-1].split("?")[0]
-    
+    handle = extract_handle(url)
+
     query = """
     query getProduct($handle: String!) {
-      product(handle: $handle) {
-        title
-        vendor
-        description
-        images(first: 20) { nodes { url } }
-        productType
-        priceRange {
-          minVariantPrice { amount currencyCode }
-        }
-        compareAtPriceRange {
-          minVariantPrice { amount currencyCode }
-        }
-        variants(first: 250) {
-          edges {
-            node {
-              selectedOptions { name value }
-              price { amount currencyCode }
-            }
-          }
-        }
-      }
+      product(handle: $handle) { ...ProductDetails }
     }
-    """
+    """ + PRODUCT_FIELDS
 
     payload = {"query": query, "variables": {"handle": handle}}
 
     try:
-        r = requests.post(API_URL, headers=HEADERS, json=payload)
+        r = transport.post(API_URL, headers=HEADERS, json=payload, timeout=TIMEOUT)
         r.raise_for_status()
         data = r.json()
 
@@ -50,36 +100,47 @@ def get_details(url):
         if not product:
             return {}
 
-        # Extract sizes (from variant option "Size")
-        sizes = []
-        for edge in product["variants"]["edges"]:
-            opts = edge["node"]["selectedOptions"]
-            for o in opts:
-                if o["name"].lower() == "size":
-                    sizes.append(o["value"])
-
-        return {
-            "url": url,
-            "title": product["title"],
-            "brand": product["vendor"],
-            "description": product["description"],
-            "rental_prices": {
-                "amount": float(product["priceRange"]["minVariantPrice"]["amount"]),
-                "currency": product["priceRange"]["minVariantPrice"]["currencyCode"]
-            },
-            "daily_rate": None,  # API does not expose daily rate
-            "retail_price": (
-                {
-                    "amount": float(product["compareAtPriceRange"]["minVariantPrice"]["amount"]),
-                    "currency": product["compareAtPriceRange"]["minVariantPrice"]["currencyCode"]
-                }
-                if product.get("compareAtPriceRange") and product["compareAtPriceRange"]["minVariantPrice"]
-                else None
-            ),
-            "sizes": sorted(list(set(sizes))),
-            "images": [img["url"] for img in product["images"]["nodes"]],
-        }
+        return build_product(url, product)
 
     except Exception as e:
         print("Error:", e)
-        return {}
\ No newline at end of file
+        return {}
+
+def get_details_batch(urls):
+    """
+    Fetch many products in one GraphQL document per BATCH_SIZE urls, using
+    an aliased product(handle:) field per url. Returns {url: item}; products
+    that are missing or fail to parse map to {} just like get_details.
+    """
+    details = {url: {} for url in urls}
+
+    for start in range(0, len(urls), BATCH_SIZE):
+        chunk = urls[start:start + BATCH_SIZE]
+        variables = {f"h{i}": extract_handle(url) for i, url in enumerate(chunk)}
+        query = (
+            "query getProducts("
+            + ", ".join(f"$h{i}: String!" for i in range(len(chunk)))
+            + ") {\n"
+            + "".join(f"  p{i}: product(handle: $h{i}) {{ ...ProductDetails }}\n" for i in range(len(chunk)))
+            + "}\n"
+            + PRODUCT_FIELDS
+        )
+
+        try:
+            r = transport.post(API_URL, headers=HEADERS, json={"query": query, "variables": variables}, timeout=TIMEOUT)
+            r.raise_for_status()
+            data = r.json().get("data") or {}
+        except Exception as e:
+            print("Error:", e)
+            continue
+
+        for i, url in enumerate(chunk):
+            product = data.get(f"p{i}")
+            if not product:
+                continue
+            try:
+                details[url] = build_product(url, product)
+            except Exception as e:
+                print("Error:", e)
+
+    return details
@@ -0,0 +1,55 @@
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+### fast HTML parsing backend for the product page scrapers (gmd_2, mwhq_2, br_2)
+# When enabled (default) pages are parsed with lxml's C parser if it is
+# installed, and the parts of the page no extractor reads are cut out of the
+# markup before parsing: <style> blocks, comments, and every <script> that
+# doesn't mention one of the caller's keywords. None of these contribute to
+# get_text(), so the extracted dicts stay the same.
+# Check with benchmarks/parse_html.py on saved pages.
+
+try:
+    import lxml  # noqa: F401
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+FAST_HTML_PARSER = os.getenv("FAST_HTML_PARSER", "true").lower() == "true"
+
+# one left-to-right scan, so a "<!--" inside a script can't start a comment
+_UNUSED_RE = re.compile(
+    r"<script\b[^>]*>(?P<script>.*?)</script\s*>"
+    r"|<style\b[^>]*>.*?</style\s*>"
+    r"|<!--.*?-->",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def strip_unused(html: str, keep_scripts=()) -> str:
+    """Drop styles, comments and scripts not containing any of keep_scripts (case-insensitive)."""
+    keep = [k.lower() for k in keep_scripts]
+
+    def replace(match):
+        script = match.group("script")
+        if script is not None and any(k in script.lower() for k in keep):
+            return match.group(0)
+        return ""
+
+    return _UNUSED_RE.sub(replace, html)
+
+
+def parser_name() -> str:
+    return "lxml" if FAST_HTML_PARSER and HAVE_LXML else "html.parser"
+
+
+def make_soup(html: str, keep_scripts=()) -> BeautifulSoup:
+    """
+    BeautifulSoup tree for a product page.
+    keep_scripts: keywords of the <script> blocks the extractor reads.
+    """
+    if not FAST_HTML_PARSER:
+        return BeautifulSoup(html, "html.parser")
+    return BeautifulSoup(strip_unused(html, keep_scripts), parser_name())
@@ -1,4 +1,5 @@
-import requests
+from sites import transport
+from sites.hurr_2 import build_product
 import json
 
 API_URL = "https://hurr-eu.ent.eu-west-2.aws.cloud.es.io/api/as/v1/engines/search-production-hurr-listings-v4/multi_search.json"
@@ -22,7 +23,7 @@ def fetch_hurr(query, max_per_site, page=1, ):
     }
 
     try:
-        r = requests.post(API_URL, headers=HEADERS, json=payload, timeout=15)
+        r = transport.post(API_URL, headers=HEADERS, json=payload, timeout=15)
         r.raise_for_status()
         return r.json()
     except Exception as e:
@@ -35,9 +36,12 @@ def correct_hurr_url(slug: str) -> str:
     return f"https://www.hurrcollective.com/listings/{slug}"
 
 
-def get_item_urls(query, max_per_site):
-
-    item_urls = []
+def get_items(query, max_per_site):
+    """
+    Search HURR and return items built straight from the search hits.
+    The search engine returns the same listing documents get_details reads,
+    so these items are already complete.
+    """
     data = fetch_hurr(query, max_per_site, page=1)
 
     if not data:
@@ -50,9 +54,8 @@ def get_item_urls(query, max_per_site):
         print("No more results.")
         return []
 
-    for item in results:
-        slug = item.get("slug", {}).get("raw", "")
-        url = f"https://www.hurrcollective.com/listings/{slug}"
-        item_urls.append(url)
+    return [build_product(item) for item in results]
 
-    return item_urls
\ No newline at end of file
+
+def get_item_urls(query, max_per_site):
+    return [item["url"] for item in get_items(query, max_per_site)]
@@ -1,5 +1,6 @@
-import requests
+from sites import transport
 import json
+from typing import Dict, List
 from urllib.parse import urlparse
 
 # ---------------------------
@@ -13,6 +14,13 @@ HEADERS = {
 }
 
 API_URL = "https://hurr-eu.ent.eu-west-2.aws.cloud.es.io/api/as/v1/engines/search-production-hurr-listings-v4/multi_search.json"
+# App Search accepts at most 10 queries per multi_search request
+BATCH_SIZE = 10
+
+# fields get_details returns (search hits that already have all of them skip the detail fetch)
+DETAIL_FIELDS = (
+    "url", "title", "brand", "description", "sizes", "images", "rental_periods", "retail_price",
+)
 
 # ---------------------------
 # FUNCTIONS
@@ -52,35 +60,8 @@ def generate_rental_periods(daily_rate: float):
         })
     return rental_data
 
-def get_details(url: str) -> dict:
-    """Fetch a HURR listing from a full URL and return detailed info."""
-    slug = extract_slug_from_url(url)
-    if not slug:
-        print("✗ Could not extract slug from URL")
-        return {}
-
-    payload = {
-        "queries": [
-            {
-                "query": slug,
-                "page": {"current": 1, "size": 1}
-            }
-        ]
-    }
-
-    r = requests.post(API_URL, headers=HEADERS, json=payload, timeout=15)
-    if r.status_code != 200:
-        print("✗ API request failed")
-        return {}
-
-    data = r.json()
-    results = data[0].get("results", [])
-    if not results:
-        print("✗ No listing found in API")
-        return {}
-
-    item = results[0]
-
+def build_product(item: dict) -> dict:
+    """Turn one search API result into our item dict."""
     # Extract fields
     slug_value = item.get("slug", {}).get("raw", "")
     title = item.get("item_name", {}).get("raw")
@@ -109,4 +90,68 @@ def get_details(url: str) -> dict:
         "retail_price": retail_price
     }
 
-    return product
\ No newline at end of file
+    return product
+
+def get_details(url: str) -> dict:
+    """Fetch a HURR listing from a full URL and return detailed info."""
+    slug = extract_slug_from_url(url)
+    if not slug:
+        print("✗ Could not extract slug from URL")
+        return {}
+
+    payload = {
+        "queries": [
+            {
+                "query": slug,
+                "page": {"current": 1, "size": 1}
+            }
+        ]
+    }
+
+    r = transport.post(API_URL, headers=HEADERS, json=payload, timeout=15)
+    if r.status_code != 200:
+        print("✗ API request failed")
+        return {}
+
+    data = r.json()
+    results = data[0].get("results", [])
+    if not results:
+        print("✗ No listing found in API")
+        return {}
+
+    return build_product(results[0])
+
+def get_details_batch(urls: List[str]) -> Dict[str, dict]:
+    """
+    Fetch several HURR listings with one multi_search request per
+    BATCH_SIZE urls (one query per slug). Returns {url: item}; urls that
+    could not be resolved map to {} just like get_details.
+    """
+    details = {url: {} for url in urls}
+    slugs = [(url, extract_slug_from_url(url)) for url in urls]
+    slugs = [(url, slug) for url, slug in slugs if slug]
+
+    for start in range(0, len(slugs), BATCH_SIZE):
+        chunk = slugs[start:start + BATCH_SIZE]
+        payload = {
+            "queries": [
+                {
+                    "query": slug,
+                    "page": {"current": 1, "size": 1}
+                }
+                for _, slug in chunk
+            ]
+        }
+
+        r = transport.post(API_URL, headers=HEADERS, json=payload, timeout=15)
+        if r.status_code != 200:
+            print("✗ API request failed")
+            continue
+
+        # one response entry per query, in the same order
+        for (url, _), response in zip(chunk, r.json()):
+            results = response.get("results", [])
+            if results:
+                details[url] = build_product(results[0])
+
+    return details
\ No newline at end of file
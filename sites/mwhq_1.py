@@ -1,4 +1,4 @@
-import requests
+from sites import transport
 from typing import List
 
 BASE_DOMAIN = "https://www.mywardrobehq.com"
@@ -24,7 +24,7 @@ def fetch_products_page(query: str, page: int) -> List[dict]:
         "type": "json",
         "page": page
     }
-    resp = requests.get(API_ENDPOINT, headers=HEADERS, params=params, timeout=15)
+    resp = transport.get(API_ENDPOINT, headers=HEADERS, params=params, timeout=15)
     resp.raise_for_status()
     data = resp.json()
     return data if isinstance(data, list) else []
@@ -35,8 +35,12 @@ def build_product_url(product: dict) -> str:
     product_id = product.get("id")
     return f"{BASE_DOMAIN}/{brand_slug}/{product_slug}/P{product_id}"
 
-def get_item_urls(query: str, max_per_site: int) -> List[str]:
-    urls = []
+def get_items(query: str, max_per_site: int) -> List[dict]:
+    """
+    Search results as partial items. The listing JSON gives us little beyond
+    the url, so get_details still fills in the rest.
+    """
+    items = []
     pages_needed = -(-max_per_site // PAGE_SIZE)  # ceiling division
 
     for page in range(pages_needed):
@@ -46,10 +50,13 @@ def get_item_urls(query: str, max_per_site: int) -> List[str]:
         for product in products:
             if product.get("overallStatus", "").upper() == "SOLD":
                 continue
-            urls.append(build_product_url(product))
-            if len(urls) >= max_per_site:
+            items.append({"platform": "MyWardrobeHQ", "url": build_product_url(product)})
+            if len(items) >= max_per_site:
                 break
-        if len(urls) >= max_per_site:
+        if len(items) >= max_per_site:
             break
 
-    return urls
\ No newline at end of file
+    return items
+
+def get_item_urls(query: str, max_per_site: int) -> List[str]:
+    return [item["url"] for item in get_items(query, max_per_site)]
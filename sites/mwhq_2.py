@@ -1,156 +1,238 @@
-import requests
-from bs4 import BeautifulSoup
+from sites import transport
+from sites.html_parse import make_soup
+from bs4.element import CData, NavigableString, Tag
+from typing import List, Optional, Tuple
 import json
 import re
 import time
 
-def get_details(url: str) -> dict:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-GB,en;q=0.9"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9"
+}
+
+# keywords marking the material / sizing blocks of a product page
+MATERIAL_WORDS = ('material', 'fabric', 'composition', 'cotton', 'polyester')
+SIZING_WORDS = ('model', 'height', 'wearing', 'size guide')
+SIZE_LABELS = ('XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL')
+# longest element text scan_page ever needs to look at
+TEXT_CAP = 500
+
+# fields get_details returns (search hits that already have all of them skip the page fetch)
+DETAIL_FIELDS = (
+    "platform", "url", "title", "designer", "description", "material_info", "sizing_info",
+    "sizes", "sale_price", "hire_price", "retail_price", "image",
+)
+
+def fetch_page(url: str, validators: Optional[dict] = None):
+    """Fetch a product page (as a conditional GET if ETag/Last-Modified validators are given)."""
+    headers = {**HEADERS, **transport.conditional_headers(validators)}
+    return transport.get(url, headers=headers, timeout=15)
+
+def parse_details(url: str, html: str) -> dict:
+    """Extract all relevant info from a MyWardrobeHQ product page."""
+    # only scripts mentioning sizes are read below
+    soup = make_soup(html, keep_scripts=("size",))
+
+    title = None
+    og_title = soup.find("meta", property="og:title")
+    if og_title:
+        title_full = og_title.get("content", "")
+        # Remove " | MY WARDROBE HQ" and "Rent Buy" prefix
+        title = title_full.replace("| MY WARDROBE HQ", "").replace("Rent Buy", "").strip()
+    
+    if not title:
+        title_tag = soup.find("title")
+        if title_tag:
+            title = title_tag.get_text().replace("| MY WARDROBE HQ", "").replace("Rent Buy", "").strip()
+    
+    designer = None
+    if title:
+        # Designer is typically the first part before the product name
+        parts = title.split()
+        # Look for all-caps words at the start (designer names)
+        designer_parts = []
+        for part in parts:
+            if part.isupper() and len(part) > 1:
+                designer_parts.append(part)
+            else:
+                break
+        if designer_parts:
+            designer = " ".join(designer_parts)
+    
+    image = None
+    og_image = soup.find("meta", property="og:image")
+    if og_image:
+        image = og_image.get("content")
+        # Convert to full size if it's a thumb
+        if image and 'thumb_' in image:
+            image = image.replace('thumb_', '')
+    
+    description = None
+    og_desc = soup.find("meta", property="og:description")
+    if og_desc:
+        description = og_desc.get("content", "").strip()
+    
+    if not description:
+        desc_meta = soup.find("meta", attrs={"name": "description"})
+        if desc_meta:
+            description = desc_meta.get("content", "").strip()
+    
+    page_text = soup.get_text()
+    
+    # Sale price (current price)
+    sale_price = None
+    sale_matches = re.findall(r'(?:SALE|BUY NOW)[:\s]*£([\d,]+)', page_text, re.IGNORECASE)
+    if sale_matches:
+        sale_price = int(sale_matches[0].replace(',', ''))
+    
+    # Retail price (RRP)
+    retail_price = None
+    rrp_matches = re.findall(r'RRP[:\s]*£([\d,]+)', page_text, re.IGNORECASE)
+    if rrp_matches:
+        retail_price = int(rrp_matches[0].replace(',', ''))
+    
+    # Rent/Hire price
+    hire_price = None
+    rent_matches = re.findall(r'(?:Rent|Rental|Hire)[:\s]*(?:from[:\s]*)?£([\d,]+)', page_text, re.IGNORECASE)
+    if rent_matches:
+        hire_price = int(rent_matches[0].replace(',', ''))
+    
+    sizes, material_info, sizing_info = scan_page(soup)
+    
+    result = {
+        "platform": "MyWardrobeHQ",
+        "url": url,
+        "title": title or "N/A",
+        "designer": designer or "N/A",
+        "description": description or "",
+        "material_info": material_info,
+        "sizing_info": sizing_info,
+        "sizes": sizes,
+        "sale_price": sale_price,
+        "hire_price": hire_price,
+        "retail_price": retail_price,
+        "image": image
     }
     
+    return result
+
+def scan_page(soup) -> Tuple[List[str], str, str]:
+    """
+    Collect sizes, material info and sizing info in ONE traversal of the page.
+
+    Equivalent to the old per-element scans (find_all + get_text on every
+    div/section/article, every <script> and every size-ish element) but each
+    element's text is built from its children's pieces, and only while it is
+    short enough (TEXT_CAP chars) to ever be used. Work per element is
+    therefore bounded by TEXT_CAP, giving O(elements * TEXT_CAP) overall
+    instead of growing with page depth.
+
+    Returns (sizes, material_info, sizing_info). Sizes come from size
+    <select> options first, then "UK n" mentions in scripts, then size
+    buttons/divs/spans, each in document order.
+    """
+    select_sizes: List[str] = []
+    script_sizes: List[str] = []
+    element_sizes: List[Tuple[int, str]] = []
+    # (document position, text); the last matching block in the document wins
+    material = (-1, "")
+    sizing = (-1, "")
+
+    # frame: [tag, children iterator, text pieces (None once over TEXT_CAP), joined length, position]
+    stack = [[soup, iter(soup.children), [], 0, 0]]
+    position = 0
+
+    while stack:
+        frame = stack[-1]
+        child = next(frame[1], None)
+
+        if child is None:
+            # all children done: this element's text is complete
+            stack.pop()
+            tag, _, parts, length, index = frame
+            name = tag.name
+
+            if parts is not None and name in ("div", "section", "article"):
+                if 20 < length < 500: # substantial but not too long
+                    text = "\n".join(parts)
+                    lower = text.lower()
+                    if any(word in lower for word in MATERIAL_WORDS) and index > material[0]:
+                        material = (index, text)
+                    if any(word in lower for word in SIZING_WORDS) and index > sizing[0]:
+                        sizing = (index, text)
+
+            # Look for size buttons/divs
+            if parts is not None and name in ("button", "div", "span"):
+                classes = tag.get("class") or []
+                if isinstance(classes, str):
+                    classes = [classes]
+                if any("size" in c.lower() for c in classes):
+                    size_text = "".join(parts)
+                    if size_text and len(size_text) < 15:
+                        # Check if it looks like a size
+                        if re.match(r'^(UK\s*)?\d+$', size_text) or size_text.upper() in SIZE_LABELS:
+                            element_sizes.append((index, size_text))
+
+            # hand this element's text up to its parent
+            if stack:
+                parent = stack[-1]
+                if parent[2] is not None:
+                    if parts is None:
+                        parent[2] = None
+                    elif parts:
+                        parent[3] += length + (1 if parent[2] else 0)
+                        parent[2].extend(parts)
+                        if parent[3] > TEXT_CAP:
+                            parent[2] = None
+            continue
+
+        if isinstance(child, Tag):
+            position += 1
+
+            # Look in select dropdowns
+            if child.name == "select":
+                select_name = str(child.get('name', '')).lower()
+                select_id = str(child.get('id', '')).lower()
+                if 'size' in select_name or 'size' in select_id or 'variant' in select_name:
+                    for opt in child.find_all("option"):
+                        opt_text = opt.get_text(strip=True)
+                        if opt_text and opt_text.lower() not in ['select', 'select size', 'please select', '']:
+                            select_sizes.append(opt_text)
+
+            # Look in script tags for product data
+            elif child.name == "script":
+                if child.string and 'size' in child.string.lower():
+                    # Look for size patterns like "UK 6", "UK 8", etc
+                    for size in re.findall(r'UK\s*(\d+)', child.string, re.IGNORECASE):
+                        script_sizes.append(f"UK {size}")
+
+            stack.append([child, iter(child.children), [], 0, position])
+
+        # plain text only (no comments, scripts or styles), as get_text() does
+        elif type(child) in (NavigableString, CData) and frame[2] is not None:
+            stripped = child.strip()
+            if stripped:
+                frame[3] += len(stripped) + (1 if frame[2] else 0)
+                frame[2].append(stripped)
+                if frame[3] > TEXT_CAP:
+                    frame[2] = None
+
+    sizes: List[str] = []
+    for size in select_sizes + script_sizes + [text for _, text in sorted(element_sizes)]:
+        if size not in sizes:
+            sizes.append(size)
+
+    return sizes, material[1], sizing[1]
+
+def get_details(url: str) -> dict:
+    """Scrape a single MyWardrobeHQ product URL for all relevant info."""
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = fetch_page(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        title = None
-        og_title = soup.find("meta", property="og:title")
-        if og_title:
-            title_full = og_title.get("content", "")
-            # Remove " | MY WARDROBE HQ" and "Rent Buy" prefix
-            title = title_full.replace("| MY WARDROBE HQ", "").replace("Rent Buy", "").strip()
-        
-        if not title:
-            title_tag = soup.find("title")
-            if title_tag:
-                title = title_tag.get_text().replace("| MY WARDROBE HQ", "").replace("Rent Buy", "").strip()
-        
-        designer = None
-        if title:
-            # Designer is typically the first part before the product name
-            parts = title.split()
-            # Look for all-caps words at the start (designer names)
-            designer_parts = []
-            for part in parts:
-                if part.isupper() and len(part) > 1:
-                    designer_parts.append(part)
-                else:
-                    break
-            if designer_parts:
-                designer = " ".join(designer_parts)
-        
-        image = None
-        og_image = soup.find("meta", property="og:image")
-        if og_image:
-            image = og_image.get("content")
-            # Convert to full size if it's a thumb
-            if image and 'thumb_' in image:
-                image = image.replace('thumb_', '')
-        
-        description = None
-        og_desc = soup.find("meta", property="og:description")
-        if og_desc:
-            description = og_desc.get("content", "").strip()
-        
-        if not description:
-            desc_meta = soup.find("meta", attrs={"name": "description"})
-            if desc_meta:
-                description = desc_meta.get("content", "").strip()
-        
-        page_text = soup.get_text()
-        
-        # Sale price (current price)
-        sale_price = None
-        sale_matches = re.findall(r'(?:SALE|BUY NOW)[:\s]*£([\d,]+)', page_text, re.IGNORECASE)
-        if sale_matches:
-            sale_price = int(sale_matches[0].replace(',', ''))
-        
-        # Retail price (RRP)
-        retail_price = None
-        rrp_matches = re.findall(r'RRP[:\s]*£([\d,]+)', page_text, re.IGNORECASE)
-        if rrp_matches:
-            retail_price = int(rrp_matches[0].replace(',', ''))
-        
-        # Rent/Hire price
-        hire_price = None
-        rent_matches = re.findall(r'(?:Rent|Rental|Hire)[:\s]*(?:from[:\s]*)?£([\d,]+)', page_text, re.IGNORECASE)
-        if rent_matches:
-            hire_price = int(rent_matches[0].replace(',', ''))
-        
-        sizes = []
-        
-        # Method 1: Look in select dropdowns
-        selects = soup.find_all("select")
-        for select in selects:
-            select_name = str(select.get('name', '')).lower()
-            select_id = str(select.get('id', '')).lower()
-            
-            if 'size' in select_name or 'size' in select_id or 'variant' in select_name:
-                options = select.find_all("option")
-                for opt in options:
-                    opt_text = opt.get_text(strip=True)
-                    opt_value = opt.get('value', '')
-                    
-                    if opt_text and opt_text.lower() not in ['select', 'select size', 'please select', '']:
-                        if opt_text not in sizes:
-                            sizes.append(opt_text)
-        
-        # Method 2: Look in script tags for product data
-        scripts = soup.find_all("script")
-        for script in scripts:
-            if script.string and 'size' in script.string.lower():
-                # Look for size patterns like "UK 6", "UK 8", etc
-                size_matches = re.findall(r'UK\s*(\d+)', script.string, re.IGNORECASE)
-                for size in size_matches:
-                    size_str = f"UK {size}"
-                    if size_str not in sizes:
-                        sizes.append(size_str)
-        
-        # Method 3: Look for size buttons/divs
-        size_elements = soup.find_all(['button', 'div', 'span'], class_=lambda x: x and 'size' in str(x).lower())
-        for elem in size_elements:
-            size_text = elem.get_text(strip=True)
-            if size_text and len(size_text) < 15 and size_text not in sizes:
-                # Check if it looks like a size
-                if re.match(r'^(UK\s*)?\d+$', size_text) or size_text.upper() in ['XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL']:
-                    sizes.append(size_text)
-        
-        material_info = ""
-        sizing_info = ""
-        
-        # Look in divs that might contain this info
-        for div in soup.find_all(['div', 'section', 'article']):
-            div_text = div.get_text("\n", strip=True)
-            
-            if len(div_text) > 20:  # Substantial content
-                if any(word in div_text.lower() for word in ['material', 'fabric', 'composition', 'cotton', 'polyester']):
-                    if len(div_text) < 500:  # Not too long
-                        material_info = div_text
-                
-                if any(word in div_text.lower() for word in ['model', 'height', 'wearing', 'size guide']):
-                    if len(div_text) < 500:
-                        sizing_info = div_text
-        
-        result = {
-            "platform": "MyWardrobeHQ",
-            "url": url,
-            "title": title or "N/A",
-            "designer": designer or "N/A",
-            "description": description or "",
-            "material_info": material_info,
-            "sizing_info": sizing_info,
-            "sizes": sizes,
-            "sale_price": sale_price,
-            "hire_price": hire_price,
-            "retail_price": retail_price,
-            "image": image
-        }
-        
-        return result
-        
+        return parse_details(url, response.text)
+
     except Exception as e:
         print(f"✗ Error: {e}")
         import traceback
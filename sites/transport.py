@@ -0,0 +1,124 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+### shared HTTP transport for the site scrapers
+# Every scraper goes through get()/post() here instead of bare requests calls,
+# so each host gets one pooled keep-alive session that is reused both within a
+# recommendation and across recommendations.
+
+# default timeout (seconds) for hosts/calls that don't set their own
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+# keep-alive connections kept open per host (should be >= DETAIL_PER_HOST)
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+# retries for connection errors and throttling/5xx responses
+MAX_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+
+_sessions: Dict[str, requests.Session] = {}
+_host_config: Dict[str, Dict] = {}
+_lock = threading.Lock()
+_sent = threading.local()
+
+
+def _host_key(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+def _retry_policy() -> Retry:
+    return Retry(
+        total=MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # the POST endpoints we call are read-only search/GraphQL queries
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def configure_host(url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> None:
+    """
+    Set default headers and/or timeout for the host of url.
+    Per-call headers are still merged on top of these.
+    """
+    key = _host_key(url)
+    with _lock:
+        config = _host_config.setdefault(key, {})
+        if headers is not None:
+            config["headers"] = dict(headers)
+        if timeout is not None:
+            config["timeout"] = timeout
+        session = _sessions.get(key)
+        if session is not None and headers is not None:
+            session.headers.update(headers)
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the pooled session for the host of url, creating it on first use."""
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=_retry_policy())
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # sessions are shared by every user, so never carry cookies between calls
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            session.headers.update(_host_config.get(key, {}).get("headers", {}))
+            _sessions[key] = session
+    return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the host's pooled session (with the host's default timeout)."""
+    if kwargs.get("timeout") is None:
+        kwargs["timeout"] = _host_config.get(_host_key(url), {}).get("timeout", DEFAULT_TIMEOUT)
+    _sent.count = requests_sent() + 1
+    return get_session(url).request(method, url, **kwargs)
+
+
+def requests_sent() -> int:
+    """Requests sent from the calling thread so far (retries of one request count once)."""
+    return getattr(_sent, "count", 0)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+## conditional GET helpers (used to revalidate cached product pages)
+def conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Turn stored ETag/Last-Modified validators into If-None-Match/If-Modified-Since headers."""
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def response_validators(response: requests.Response) -> Dict[str, str]:
+    """ETag/Last-Modified of a response, for a later conditional GET."""
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+    return validators